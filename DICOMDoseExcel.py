@@ -11,72 +11,272 @@ import os
 import glob
 import argparse
 import re
+import io
+import math
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.dimensions import ColumnDimension
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+
+try:
+    import ijson  # Opcional: leitura incremental de JSONs grandes
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # Opcional: decodificação mais rápida quando o JSON é carregado inteiro
+except ImportError:
+    orjson = None
+
+
+# Título da aba
+SHEET_TITLE = "Relatórios DICOM CT"
+
+# Cabeçalhos da planilha
+HEADERS = (
+    "ID do paciente", "Nome do paciente", "Sexo", "Data de nascimento", "Idade", "Pesquisa de interesse",
+    "Data do exame", "Descrição da série", "Scan mode", "mAs",
+    "kV", "CTDIvol", "DLP", "DLP total", "Phantom type", "SSDE", "Avg scan size"
+)
+
+# Larguras das colunas
+COLUMN_WIDTHS = {
+    'A': 15,  # ID do paciente
+    'B': 25,  # Nome do paciente
+    'C': 10,  # Sexo
+    'D': 18,  # Data de nascimento
+    'E': 10,  # Idade
+    'F': 20,  # Pesquisa de interesse
+    'G': 18,  # Data do exame
+    'H': 20,  # Descrição da série
+    'I': 15,  # Scan mode
+    'J': 10,  # mAs
+    'K': 10,  # kV
+    'L': 10,  # CTDIvol
+    'M': 10,  # DLP
+    'N': 10,  # DLP total
+    'O': 15,  # Phantom type
+    'P': 10,  # SSDE
+    'Q': 15,  # Avg scan size
+}
+
+# Estilos (criados uma única vez, no import)
+HEADER_FILL = PatternFill(start_color="E8F4FD", end_color="E8F4FD", fill_type="solid")  # Azul claro para DICOM
+HEADER_FONT = Font(bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='center', wrap_text=True)
+THIN_SIDE = Side(style='thin')
+BORDER = Border(left=THIN_SIDE, right=THIN_SIDE, top=THIN_SIDE, bottom=THIN_SIDE)
+
+# Partes fixas do .xlsx gerado pelo engine "fastxml"
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet_title}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Estilos: 0 = padrão, 1 = linha de dados (borda fina), 2 = cabeçalho (negrito, fundo azul, centralizado)
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font>'
+    '</fonts>'
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00E8F4FD"/><bgColor rgb="00E8F4FD"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="1" xfId="0" '
+    'applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center" wrapText="1"/></xf>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<cols>{cols}</cols><sheetData>\n'
+)
+
+XLSX_SHEET_END = '</sheetData></worksheet>'
+
+# Caracteres de controle não permitidos em XML
+ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Formatos aceitos para a data de nascimento (fallback via strptime)
+BIRTH_FORMATS = (
+    '%b %d, %Y',
+    '%B %d, %Y',
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+)
+
+# Formatos aceitos para a data do exame (fallback via strptime)
+EXAM_FORMATS = (
+    '%b %d, %Y, %I:%M:%S %p',  # "May 5, 2025, 1:20:41 PM"
+    '%B %d, %Y, %I:%M:%S %p',  # "May 5, 2025, 1:20:41 PM"
+    '%b %d, %Y',  # "May 5, 2025"
+    '%B %d, %Y',  # "May 5, 2025"
+    '%Y-%m-%d',  # "2025-05-05"
+    '%d/%m/%Y',  # "05/05/2025"
+    '%m/%d/%Y',  # "05/05/2025"
+)
+
+# Formatos numéricos possíveis por tamanho da string ("5/5/2025" a "2025-05-05").
+# Datas com nome do mês são resolvidas pelo parser rápido; tamanhos fora da
+# tabela usam a lista completa de formatos.
+NUMERIC_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y')
+BIRTH_FORMATS_BY_LENGTH = {8: NUMERIC_FORMATS, 9: NUMERIC_FORMATS, 10: NUMERIC_FORMATS}
+EXAM_FORMATS_BY_LENGTH = {8: NUMERIC_FORMATS, 9: NUMERIC_FORMATS, 10: NUMERIC_FORMATS}
+
+# Ano com 4 dígitos (fallback quando a data não pôde ser interpretada)
+YEAR_PATTERN = re.compile(r'\d{4}')
+
+# Nomes de meses (abreviados e completos) para o parser rápido
+MONTH_NUMBERS = {
+    name: number
+    for number, full_name in enumerate(('January', 'February', 'March', 'April', 'May', 'June', 'July',
+                                        'August', 'September', 'October', 'November', 'December'), 1)
+    for name in (full_name, full_name[:3])
+}
+
+
+def _parse_iso(date_str):
+    """Parser rápido para datas ISO "2025-05-05" (sem strptime)"""
+    if len(date_str) >= 10 and date_str[4] == '-' and date_str[7] == '-':
+        try:
+            return datetime(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10]))
+        except ValueError:
+            return None
+    return None
+
+
+def _parse_month_day_year(date_str):
+    """Parser rápido para "May 5, 2025" (o horário após a data, se houver, é ignorado)"""
+    parts = date_str.split(',', 2)
+    if len(parts) < 2:
+        return None
+
+    month_day = parts[0].split()
+    year = parts[1].strip()
+    if len(month_day) != 2 or len(year) != 4:
+        return None
+
+    month = MONTH_NUMBERS.get(month_day[0])
+    if month is None:
+        return None
 
+    try:
+        return datetime(int(year), month, int(month_day[1]))
+    except ValueError:
+        return None
+
+
+def parse_date(date_str, formats, formats_by_length):
+    """Converte uma data textual, tentando os parsers rápidos antes do strptime"""
+    date_str = date_str.strip()
+
+    parsed = _parse_iso(date_str) or _parse_month_day_year(date_str)
+    if parsed:
+        return parsed
+
+    # Só tenta os formatos compatíveis com o tamanho da string
+    for fmt in formats_by_length.get(len(date_str), formats):
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+
+    return None
 
+
+@lru_cache(maxsize=4096)
 def calculate_age(birth_date_str, exam_date_str):
-    """Calcula a idade do paciente na época do exame."""
+    """
+    Calcula a idade do paciente na época do exame (cache limitado por par de datas).
+    Retorna a idade em anos (int) ou None se não for possível calculá-la.
+    """
     if not birth_date_str or not exam_date_str:
-        return '-'
+        return None
 
     try:
-        # Tenta parsing com diferentes formatos de data
-        birth_date = None
-        exam_date = None
-
-        # Parsing da data de nascimento - formatos comuns
-        birth_formats = [
-            '%b %d, %Y',
-            '%B %d, %Y',
-            '%Y-%m-%d',
-            '%d/%m/%Y',
-            '%m/%d/%Y',
-        ]
-
-        for fmt in birth_formats:
-            try:
-                birth_date = datetime.strptime(birth_date_str.strip(), fmt)
-                break
-            except ValueError:
-                continue
+        # Parsing da data de nascimento
+        birth_date = parse_date(birth_date_str, BIRTH_FORMATS, BIRTH_FORMATS_BY_LENGTH)
 
         if not birth_date:
             # Se não conseguiu fazer parse, tenta extrair apenas o ano (fallback)
-            birth_year_match = re.search(r'(\d{4})', birth_date_str)
+            birth_year_match = YEAR_PATTERN.search(birth_date_str)
             if birth_year_match:
-                birth_year = int(birth_year_match.group(1))
+                birth_year = int(birth_year_match.group(0))
                 birth_date = datetime(birth_year, 1, 1)  # 1º de janeiro como aproximação
             else:
-                return '-'
-
-        # Parsing da data do exame - formatos comuns
-        exam_formats = [
-            '%b %d, %Y, %I:%M:%S %p',  # "May 5, 2025, 1:20:41 PM"
-            '%B %d, %Y, %I:%M:%S %p',  # "May 5, 2025, 1:20:41 PM"
-            '%b %d, %Y',  # "May 5, 2025"
-            '%B %d, %Y',  # "May 5, 2025"
-            '%Y-%m-%d',  # "2025-05-05"
-            '%d/%m/%Y',  # "05/05/2025"
-            '%m/%d/%Y',  # "05/05/2025"
-        ]
-
-        for fmt in exam_formats:
-            try:
-                exam_date = datetime.strptime(exam_date_str.strip(), fmt)
-                break
-            except ValueError:
-                continue
+                return None
+
+        # Parsing da data do exame
+        exam_date = parse_date(exam_date_str, EXAM_FORMATS, EXAM_FORMATS_BY_LENGTH)
 
         if not exam_date:
             # Se não conseguiu fazer parse, tenta extrair apenas o ano (fallback)
-            exam_year_match = re.search(r'(\d{4})', exam_date_str)
+            exam_year_match = YEAR_PATTERN.search(exam_date_str)
             if exam_year_match:
-                exam_year = int(exam_year_match.group(1))
+                exam_year = int(exam_year_match.group(0))
                 exam_date = datetime(exam_year, 6, 15)  # Meio do ano como aproximação
             else:
-                return '-'
+                return None
 
         age = exam_date.year - birth_date.year
 
@@ -84,156 +284,174 @@ def calculate_age(birth_date_str, exam_date_str):
         if (exam_date.month, exam_date.day) < (birth_date.month, birth_date.day):
             age -= 1  # Subtrai 1 se o aniversário ainda não chegou
 
-        return str(age)
+        return age
 
     except Exception as e:
         # Em caso de erro, tenta o cálculo simples por ano
-        birth_year_match = re.search(r'(\d{4})', birth_date_str)
-        exam_year_match = re.search(r'(\d{4})', exam_date_str)
+        birth_year_match = YEAR_PATTERN.search(birth_date_str)
+        exam_year_match = YEAR_PATTERN.search(exam_date_str)
 
         if birth_year_match and exam_year_match:
-            birth_year = int(birth_year_match.group(1))
-            exam_year = int(exam_year_match.group(1))
+            birth_year = int(birth_year_match.group(0))
+            exam_year = int(exam_year_match.group(0))
             age = exam_year - birth_year
-            return str(age)
+            return age
 
-        return '-'
-
-
-def extract_scan_info(acquisition):
-    """Extrai informações de aquisição para cada linha, exatamente como estão no JSON"""
-    scan_info = {}
+        return None
 
-    # Protocolo (será usado como Pesquisa de interesse)
-    scan_info['protocol'] = acquisition.get('protocol', '-')
 
-    # Descrição da série (APENAS comment, sem fallback)
-    # Tratamento especial para comment (garantir que null se torne '-')
-    comment = acquisition.get('comment')
-    # Múltiplas verificações para garantir que qualquer valor "vazio" se torne '-'
-    if comment is None or comment == '' or (isinstance(comment, str) and comment.strip() == '') or comment == 'null':
-        scan_info['description'] = '-'
-    else:
-        scan_info['description'] = comment
-
-    # Scan mode (tipo de aquisição)
-    scan_info['scan_mode'] = acquisition.get('acquisition_type', '-')
-
-    # Phantom type
-    ct_dose = acquisition.get('ct_dose', {}) or {}  # Usa {} se for None
-    scan_info['phantom_type'] = ct_dose.get('phantom_type', '-')
+def _clean(value):
+    """Converte valores "vazios" (None, string vazia/espaços, 'null' ou não-texto) em '-'"""
+    if value is None or not isinstance(value, str) or not value.strip() or value == 'null':
+        return '-'
+    return value
 
-    # CTDI vol - valor exato como está no JSON
-    ctdivol = ct_dose.get('mean_ctdivol')
-    scan_info['ctdivol'] = ctdivol if ctdivol is not None else '-'
 
-    # DLP - valor exato como está no JSON
-    dlp = ct_dose.get('dlp')
-    scan_info['dlp'] = dlp if dlp is not None else '-'
+def _patient_id_value(patient_id):
+    """Retorna o ID do paciente como número quando possível, ou '-' se ausente"""
+    if not patient_id:
+        return '-'
+    # Só dígitos ASCII: '+12', ' 42', '-5' ou '1_000' continuam como texto
+    if isinstance(patient_id, str) and patient_id.isascii() and patient_id.isdigit():
+        return int(patient_id)
+    return patient_id
 
-    # SSDE - valor exato como está no JSON, com tratamento especial para None
-    ssde = ct_dose.get('size_specific_dose')
-    scan_info['ssde'] = ssde if ssde is not None else '-'
 
-    # Dados da fonte de raios X
-    xray_params = acquisition.get('xray_source_params', {}) or {}  # Usa {} se for None
+def _dash(data, key):
+    """Lê uma chave do dicionário, convertendo ausente/None (null no JSON) em '-'"""
+    value = data.get(key)
+    return '-' if value is None else value
 
-    # Tube current - valor exato como está no JSON
-    tube_current = xray_params.get('tube_current')
-    scan_info['tube_current'] = tube_current if tube_current is not None else '-'
 
-    # kV - valor exato como está no JSON
-    kv = xray_params.get('kvp')
-    scan_info['kv'] = kv if kv is not None else '-'
+def extract_scan_info(acquisition):
+    """Extrai informações de aquisição para cada linha, exatamente como estão no JSON"""
+    ct_dose = acquisition.get('ct_dose') or {}  # Usa {} se for None
+    xray_params = acquisition.get('xray_source_params') or {}  # Usa {} se for None
+
+    return {
+        # Protocolo (será usado como Pesquisa de interesse)
+        'protocol': _dash(acquisition, 'protocol'),
+        # Descrição da série (APENAS comment, sem fallback; null/vazio se torna '-')
+        'description': _clean(acquisition.get('comment')),
+        # Scan mode (tipo de aquisição)
+        'scan_mode': _dash(acquisition, 'acquisition_type'),
+        # Dados de dose - valores exatos como estão no JSON
+        'phantom_type': _dash(ct_dose, 'phantom_type'),
+        'ctdivol': _dash(ct_dose, 'mean_ctdivol'),
+        'dlp': _dash(ct_dose, 'dlp'),
+        'ssde': _dash(ct_dose, 'size_specific_dose'),
+        # Dados da fonte de raios X - valores exatos como estão no JSON
+        'tube_current': _dash(xray_params, 'tube_current'),
+        'kv': _dash(xray_params, 'kvp'),
+        # Avg scan size - não está disponível geralmente
+        'avg_scan_size': '-',
+    }
+
+
+class StreamingJSONError(Exception):
+    """Erro do ijson durante a leitura incremental (o arquivo ainda pode ser lido inteiro)"""
+
+
+def iter_json_items(json_file, prefix):
+    """Percorre os itens de um JSON sob o prefixo informado, um de cada vez (ijson)"""
+    with open(json_file, 'rb') as f:
+        try:
+            yield from ijson.items(f, prefix, use_float=True)
+        except ijson.JSONError as e:
+            # Mensagens do ijson ocupam várias linhas (com o trecho do erro): mantém só a primeira
+            raise StreamingJSONError(str(e).strip().partition('\n')[0]) from e
+
+
+def detect_streaming_format(json_file):
+    """
+    Identifica o formato pelos primeiros eventos do ijson (sem percorrer o arquivo):
+    'legacy' para uma lista, 'consolidated' para um objeto cuja primeira chave é metadata
+    e None nos demais casos (o arquivo é então carregado inteiro)
+    """
+    with open(json_file, 'rb') as f:
+        events = ijson.parse(f)
+        try:
+            _, event, _ = next(events)
+            if event == 'start_array':
+                return 'legacy'
+            if event == 'start_map':
+                _, event, value = next(events)
+                if event == 'map_key' and value == 'metadata':
+                    return 'consolidated'
+        except (ijson.JSONError, StopIteration):
+            pass
+    return None
+
+
+def load_reports(json_file):
+    """Carrega o arquivo JSON inteiro (com orjson, se disponível) e retorna a lista de relatórios"""
+    with open(json_file, 'rb') as f:
+        content = f.read()
+
+    data = None
+    if orjson is not None:
+        try:
+            data = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # O json padrão aceita extensões que o orjson rejeita (ex.: NaN, Infinity)
+            pass
+    if data is None:
+        data = json.loads(content)
+
+    # Verifica se é o formato consolidado novo (com metadata e reports)
+    if isinstance(data, dict) and 'metadata' in data and 'reports' in data:
+        reports = data['reports']
+        print(f"✓ JSON consolidado detectado com {len(reports)} relatórios")
+        print(f"  Gerado em: {data['metadata'].get('generated_at', 'N/A')}")
+    elif isinstance(data, list):
+        # Formato legado (lista direta de relatórios)
+        reports = data
+        print(f"✓ JSON legado detectado com {len(reports)} relatórios")
+    else:
+        # Objeto único
+        reports = [data]
+        print(f"✓ Relatório único detectado")
 
-    # Avg scan size - não está disponível geralmente
-    scan_info['avg_scan_size'] = '-'
+    return reports
 
-    return scan_info
 
+def read_reports(json_file):
+    """
+    Lê os relatórios do arquivo JSON (consolidado, legado ou objeto único).
 
-def json_to_excel(json_file, output_file="ct_dose_dicom_report.xlsx"):
-    """Converte os dados JSON de DICOM para Excel"""
+    Com ijson instalado, os formatos consolidado e legado são lidos em streaming
+    e os relatórios são entregues um a um; sem ijson, o arquivo é carregado inteiro
+    (com orjson, se disponível).
+    """
+    if ijson is not None:
+        file_format = detect_streaming_format(json_file)
 
-    # Lê o arquivo JSON (pode ser consolidado ou legado)
-    try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Verifica se é o formato consolidado novo (com metadata e reports)
-        if isinstance(data, dict) and 'metadata' in data and 'reports' in data:
-            reports = data['reports']
-            print(f"✓ JSON consolidado detectado com {len(reports)} relatórios")
-            print(f"  Gerado em: {data['metadata'].get('generated_at', 'N/A')}")
-        elif isinstance(data, list):
+        if file_format == 'legacy':
             # Formato legado (lista direta de relatórios)
-            reports = data
-            print(f"✓ JSON legado detectado com {len(reports)} relatórios")
-        else:
-            # Objeto único
-            reports = [data]
-            print(f"✓ Relatório único detectado")
+            print(f"✓ JSON legado detectado")
+            return iter_json_items(json_file, 'item')
 
-        print(f"✓ Processando {len(reports)} relatórios do arquivo '{os.path.basename(json_file)}'")
+        if file_format == 'consolidated':
+            # metadata é a primeira chave: só o início do arquivo é lido aqui
+            metadata_items = iter_json_items(json_file, 'metadata')
+            try:
+                metadata = next(metadata_items, None)
+            except StreamingJSONError:
+                metadata = None
+            finally:
+                metadata_items.close()
 
-    except Exception as e:
-        print(f"❌ Erro ao ler JSON: {str(e)}")
-        return False
+            if isinstance(metadata, dict):
+                # Formato consolidado novo (com metadata e reports)
+                print(f"✓ JSON consolidado detectado com {metadata.get('total_reports', 'N/A')} relatórios")
+                print(f"  Gerado em: {metadata.get('generated_at', 'N/A')}")
+                return iter_json_items(json_file, 'reports.item')
 
-    # Cria uma nova planilha Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Relatórios DICOM CT"
-
-    # Define os cabeçalhos
-    headers = [
-        "ID do paciente", "Nome do paciente", "Sexo", "Data de nascimento", "Idade", "Pesquisa de interesse",
-        "Data do exame", "Descrição da série", "Scan mode", "mAs",
-        "kV", "CTDIvol", "DLP", "DLP total", "Phantom type", "SSDE", "Avg scan size"
-    ]
-
-    # Formata os cabeçalhos
-    header_fill = PatternFill(start_color="E8F4FD", end_color="E8F4FD", fill_type="solid")  # Azul claro para DICOM
-    header_font = Font(bold=True)
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    return load_reports(json_file)
 
-    # Adiciona cabeçalhos na primeira linha
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-        cell.border = border
-
-    # Define larguras das colunas
-    ws.column_dimensions['A'].width = 15  # ID do paciente
-    ws.column_dimensions['B'].width = 25  # Nome do paciente
-    ws.column_dimensions['C'].width = 10  # Sexo
-    ws.column_dimensions['D'].width = 18  # Data de nascimento
-    ws.column_dimensions['E'].width = 10  # Idade
-    ws.column_dimensions['F'].width = 20  # Pesquisa de interesse
-    ws.column_dimensions['G'].width = 18  # Data do exame
-    ws.column_dimensions['H'].width = 20  # Descrição da série
-    ws.column_dimensions['I'].width = 15  # Scan mode
-    ws.column_dimensions['J'].width = 10  # mAs
-    ws.column_dimensions['K'].width = 10  # kV
-    ws.column_dimensions['L'].width = 10  # CTDIvol
-    ws.column_dimensions['M'].width = 10  # DLP
-    ws.column_dimensions['N'].width = 10  # DLP total
-    ws.column_dimensions['O'].width = 15  # Phantom type
-    ws.column_dimensions['P'].width = 10  # SSDE
-    ws.column_dimensions['Q'].width = 15  # Avg scan size
-
-    # Linha atual para inserção
-    row_idx = 2
-
-    # Processa cada relatório
+
+def iter_excel_rows(reports):
+    """Gera as linhas da planilha (uma por aquisição) a partir dos relatórios"""
     for report in reports:
         essential = report.get('essential', {})
 
@@ -248,6 +466,20 @@ def json_to_excel(json_file, output_file="ct_dose_dicom_report.xlsx"):
         irradiation = report.get('irradiation', {})
         total_dlp = irradiation.get('total_dlp', '')
 
+        # Patient ID como número se possível (uma vez por relatório)
+        patient_id_value = _patient_id_value(patient_id)
+
+        # Calcula a idade uma única vez por relatório (igual para todas as aquisições)
+        age = calculate_age(birth_date, study_date)
+        age_value = age if age is not None else '-'
+
+        # Valores do relatório, iguais para todas as linhas (None/null vira '-')
+        patient_name_value = patient_name if patient_name is not None else '-'
+        sex_value = sex if sex is not None else '-'
+        birth_date_value = birth_date if birth_date is not None else '-'
+        study_date_value = study_date if study_date is not None else '-'
+        total_dlp_value = total_dlp if total_dlp is not None else '-'
+
         # Processa cada aquisição/série como uma linha
         acquisitions = report.get('acquisitions', [])
         if acquisitions:
@@ -255,83 +487,239 @@ def json_to_excel(json_file, output_file="ct_dose_dicom_report.xlsx"):
                 # Obtém informações desta aquisição específica
                 scan_info = extract_scan_info(acquisition)
 
-                # Insere valores na planilha com tratamento explícito para None/null
-                patient_id_value = int(patient_id) if patient_id and patient_id.isdigit() else (patient_id if patient_id else '-')
-                ws.cell(row=row_idx, column=1, value=patient_id_value)
-                ws.cell(row=row_idx, column=2, value=patient_name if patient_name is not None else '-')
-                ws.cell(row=row_idx, column=3, value=sex if sex is not None else '-')
-                ws.cell(row=row_idx, column=4, value=birth_date if birth_date is not None else '-')
-
-                # Calcula a idade com base na data de nascimento e data do exame
-                age = calculate_age(birth_date, study_date)
-                age_value = int(age) if age != '-' and age.isdigit() else age
-                ws.cell(row=row_idx, column=5, value=age_value)
-
-                ws.cell(row=row_idx, column=6, value=scan_info['protocol'])
-                ws.cell(row=row_idx, column=7, value=study_date if study_date is not None else '-')
-                # Descrição da série - tratamento especial para garantir '-' em caso de null
-                description_value = scan_info['description']
-                # Verificação extra rigorosa para garantir que não seja null, string vazia, espaços, etc.
-                is_empty = (description_value is None or description_value == '' or
-                            description_value.strip() == '' or description_value == 'null')
-                ws.cell(row=row_idx, column=8, value='-' if is_empty else description_value)
-                ws.cell(row=row_idx, column=9, value=scan_info['scan_mode'])
-                ws.cell(row=row_idx, column=10, value=scan_info['tube_current'])
-                ws.cell(row=row_idx, column=11, value=scan_info['kv'])
-                ws.cell(row=row_idx, column=12, value=scan_info['ctdivol'])
-                ws.cell(row=row_idx, column=13, value=scan_info['dlp'])
-                ws.cell(row=row_idx, column=14, value=total_dlp if total_dlp is not None else '-')
-                ws.cell(row=row_idx, column=15, value=scan_info['phantom_type'])
-                ws.cell(row=row_idx, column=16, value=scan_info['ssde'])
-                ws.cell(row=row_idx, column=17, value=scan_info['avg_scan_size'])
-
-                # Aplica borda a todas as células
-                for col_idx in range(1, 18):
-                    ws.cell(row=row_idx, column=col_idx).border = border
-
-                row_idx += 1
+                yield (
+                    patient_id_value,
+                    patient_name_value,
+                    sex_value,
+                    birth_date_value,
+                    age_value,
+                    scan_info['protocol'],
+                    study_date_value,
+                    scan_info['description'],
+                    scan_info['scan_mode'],
+                    scan_info['tube_current'],
+                    scan_info['kv'],
+                    scan_info['ctdivol'],
+                    scan_info['dlp'],
+                    total_dlp_value,
+                    scan_info['phantom_type'],
+                    scan_info['ssde'],
+                    scan_info['avg_scan_size'],
+                )
         else:
             # Se não houver aquisições, adiciona pelo menos uma linha com dados básicos
-            patient_id_value = int(patient_id) if patient_id and patient_id.isdigit() else (patient_id if patient_id else '-')
-            ws.cell(row=row_idx, column=1, value=patient_id_value)
-            ws.cell(row=row_idx, column=2, value=patient_name if patient_name is not None else '-')
-            ws.cell(row=row_idx, column=3, value=sex if sex is not None else '-')
-            ws.cell(row=row_idx, column=4, value=birth_date if birth_date is not None else '-')
-
-            # Calcula a idade para esta linha também
-            age = calculate_age(birth_date, study_date)
-            age_value = int(age) if age != '-' and age.isdigit() else age
-            ws.cell(row=row_idx, column=5, value=age_value)
-
-            ws.cell(row=row_idx, column=6, value='-')
-            ws.cell(row=row_idx, column=7, value=study_date if study_date is not None else '-')
-            ws.cell(row=row_idx, column=8, value='-')
-            ws.cell(row=row_idx, column=9, value='-')
-            ws.cell(row=row_idx, column=10, value='-')
-            ws.cell(row=row_idx, column=11, value='-')
-            ws.cell(row=row_idx, column=12, value='-')
-            ws.cell(row=row_idx, column=13, value='-')
-            ws.cell(row=row_idx, column=14, value=total_dlp if total_dlp is not None else '-')
-            ws.cell(row=row_idx, column=15, value='-')
-            ws.cell(row=row_idx, column=16, value='-')
-            ws.cell(row=row_idx, column=17, value='-')
-
-            # Aplica borda a todas as células
-            for col_idx in range(1, 18):
-                ws.cell(row=row_idx, column=col_idx).border = border
-
-            row_idx += 1
-
-    # Salva a planilha
+            yield (
+                patient_id_value,
+                patient_name_value,
+                sex_value,
+                birth_date_value,
+                age_value,
+                '-',
+                study_date_value,
+                '-', '-', '-', '-', '-', '-',
+                total_dlp_value,
+                '-', '-', '-',
+            )
+
+        # Libera o relatório assim que suas linhas foram entregues
+        del report, acquisitions
+
+
+def _consume(reports):
+    """Entrega os relatórios de uma lista já carregada, removendo cada um dela"""
+    reports.reverse()
+    while reports:
+        yield reports.pop()
+
+
+def write_excel_openpyxl(rows, output_file):
+    """Grava as linhas com openpyxl (modo write-only) e retorna o total de linhas"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_TITLE)
+
+    # Estilo nomeado único para as linhas de dados (evita clonar a borda célula a célula)
+    row_style = NamedStyle(name="dicom_row", border=BORDER)
+    wb.add_named_style(row_style)
+
+    def styled_row(values):
+        """Cria as células da linha já com o estilo compartilhado"""
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = "dicom_row"
+            cells.append(cell)
+        return cells
+
+    # Define larguras das colunas (em modo write-only, antes do primeiro append)
+    for column_letter, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[column_letter] = ColumnDimension(ws, index=column_letter, width=width)
+
+    # Adiciona cabeçalhos na primeira linha
+    header_cells = []
+    for header in HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = HEADER_FILL
+        cell.font = HEADER_FONT
+        cell.alignment = HEADER_ALIGNMENT
+        cell.border = BORDER
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    # No modo streaming, o JSON é lido à medida que as linhas são gravadas
+    row_count = 0
+    try:
+        for row in rows:
+            ws.append(styled_row(row))
+            row_count += 1
+    except BaseException:
+        # Encerra a aba em streaming antes de propagar um erro da leitura (nenhum arquivo é salvo)
+        ws.close()
+        raise
+
+    wb.save(output_file)
+    return row_count
+
+
+def _xlsx_cell(value, style_id):
+    """Serializa uma célula em XML (números como <v>, booleanos com t="b", textos como inlineStr)"""
+    # Vazio como no openpyxl: None e '' não geram conteúdo na célula
+    if value is None or value == '':
+        return f'<c s="{style_id}"/>'
+    if isinstance(value, bool):
+        return f'<c s="{style_id}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int) or (isinstance(value, float) and math.isfinite(value)):
+        return f'<c s="{style_id}"><v>{value!r}</v></c>'
+    # NaN/Infinity não são valores numéricos válidos no xlsx: vão como texto
+    text = escape(ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c s="{style_id}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def write_excel_fastxml(rows, output_file):
+    """
+    Grava o .xlsx diretamente em XML, sem openpyxl, e retorna o total de linhas.
+
+    A planilha é escrita linha a linha dentro do ZIP (strings inline, sem
+    sharedStrings), com os mesmos estilos de cabeçalho/borda da versão openpyxl.
+    """
+    # Grava em um arquivo .part ao lado da saída, que só a substitui quando completo
+    # (um erro no meio do streaming não deixa um .xlsx truncado); criado pelo ZipFile,
+    # o arquivo recebe as permissões padrão (umask), como o do openpyxl
+    part_file = output_file + '.part'
+
     try:
-        wb.save(output_file)
-        print(f"✅ Planilha Excel DICOM salva com sucesso: '{output_file}'")
-        print(f"   Total de linhas geradas: {row_idx - 2}")
-        return True
+        row_count = _write_xlsx_zip(rows, part_file)
+        os.replace(part_file, output_file)
+    except BaseException:
+        os.remove(part_file)
+        raise
+
+    return row_count
+
+
+def _write_xlsx_zip(rows, output_file):
+    """Escreve o pacote .xlsx (ZIP) em output_file e retorna o total de linhas de dados"""
+    row_count = 0
+
+    with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        zf.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        zf.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(sheet_title=escape(SHEET_TITLE, {'"': '&quot;'})))
+        zf.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        zf.writestr('xl/styles.xml', XLSX_STYLES)
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as raw:
+            sheet = io.TextIOWrapper(raw, encoding='utf-8')
+
+            cols = ''.join(
+                f'<col min="{index}" max="{index}" width="{width}" customWidth="1"/>'
+                for index, width in enumerate(COLUMN_WIDTHS.values(), 1)
+            )
+            sheet.write(XLSX_SHEET_START.format(cols=cols))
+
+            # Cabeçalho (estilo 2) e linhas de dados (estilo 1, apenas borda)
+            header = ''.join(_xlsx_cell(value, 2) for value in HEADERS)
+            sheet.write(f'<row r="1">{header}</row>\n')
+
+            for row_idx, row in enumerate(rows, 2):
+                cells = ''.join(_xlsx_cell(value, 1) for value in row)
+                sheet.write(f'<row r="{row_idx}">{cells}</row>\n')
+                row_count += 1
+
+            sheet.write(XLSX_SHEET_END)
+            sheet.flush()
+            sheet.detach()
+
+    return row_count
+
+
+def _save_rows(writer, reports, output_file):
+    """
+    Gera as linhas dos relatórios e grava a planilha; retorna o total de linhas ou None em caso
+    de erro. Um StreamingJSONError é propagado para que o JSON seja relido inteiro.
+    """
+    try:
+        # Pipeline de geradores: cada relatório é liberado após suas linhas serem gravadas
+        if isinstance(reports, list):
+            reports = _consume(reports)
+        return writer(iter_excel_rows(reports), output_file)
+    except StreamingJSONError:
+        raise
     except Exception as e:
         print(f"❌ Erro ao salvar planilha Excel: {str(e)}")
+        return None
+
+
+def json_to_excel(json_file, output_file="ct_dose_dicom_report.xlsx", engine="openpyxl"):
+    """Converte os dados JSON de DICOM para Excel"""
+
+    # Lê o arquivo JSON (pode ser consolidado ou legado)
+    try:
+        reports = read_reports(json_file)
+
+        if isinstance(reports, list):
+            print(f"✓ Processando {len(reports)} relatórios do arquivo '{os.path.basename(json_file)}'")
+        else:
+            print(f"✓ Processando relatórios do arquivo '{os.path.basename(json_file)}' (streaming)")
+
+    except Exception as e:
+        print(f"❌ Erro ao ler JSON: {str(e)}")
+        return False
+
+    # Gera e salva a planilha
+    writer = write_excel_fastxml if engine == 'fastxml' else write_excel_openpyxl
+    try:
+        row_count = _save_rows(writer, reports, output_file)
+    except StreamingJSONError as e:
+        # O ijson rejeita JSONs que o json padrão aceita (ex.: NaN): relê o arquivo inteiro
+        print(f"⚠️ Leitura incremental interrompida, carregando o JSON inteiro: {str(e)}")
+        try:
+            reports = load_reports(json_file)
+        except Exception as e:
+            print(f"❌ Erro ao ler JSON: {str(e)}")
+            return False
+        row_count = _save_rows(writer, reports, output_file)
+
+    if row_count is None:
         return False
 
+    print(f"✅ Planilha Excel DICOM salva com sucesso: '{output_file}'")
+    print(f"   Total de linhas geradas: {row_count}")
+    return True
+
+
+def convert_many(json_files, engine="openpyxl"):
+    """
+    Converte vários arquivos JSON em paralelo (um processo por arquivo).
+    Cada planilha é salva ao lado do JSON de origem, com extensão .xlsx.
+    """
+    output_files = [os.path.splitext(json_file)[0] + '.xlsx' for json_file in json_files]
+
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(json_to_excel, json_files, output_files, [engine] * len(json_files)))
+
+    print(f"\n✅ {sum(results)}/{len(json_files)} arquivos convertidos")
+    return results
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -349,26 +737,57 @@ Exemplos de uso:
 3. Arquivo JSON legado (formato antigo):
    python DICOMDoseExcel.py ct_reports_dicom_all.json
 
+4. Relatórios muito grandes (gera o XML do Excel diretamente):
+   python DICOMDoseExcel.py dados.json --engine fastxml
+
+5. Vários arquivos em paralelo (pasta ou padrão glob; um .xlsx por JSON):
+   python DICOMDoseExcel.py pasta_com_jsons/
+   python DICOMDoseExcel.py "dicom_reports_consolidated_*.json"
+
 O script detecta automaticamente se o JSON é consolidado (novo) ou legado.
         """
     )
 
     parser.add_argument('json_file',
-                        help='Arquivo JSON com dados DICOM (consolidado ou legado)')
-    parser.add_argument('--output', type=str, default='ct_dose_dicom_report.xlsx',
+                        help='Arquivo JSON com dados DICOM (consolidado ou legado), pasta ou padrão glob')
+    parser.add_argument('--output', type=str,
                         help='Nome do arquivo Excel de saída (padrão: ct_dose_dicom_report.xlsx)')
+    parser.add_argument('--engine', choices=['openpyxl', 'fastxml'], default='openpyxl',
+                        help='Gerador do Excel: openpyxl (padrão) ou fastxml (XML direto, para relatórios muito grandes)')
 
     args = parser.parse_args()
 
+    # Pasta ou padrão glob: vários arquivos. Um arquivo existente é sempre convertido sozinho,
+    # mesmo que o nome contenha caracteres de glob (ex.: "rep[1].json")
+    multiple_files = os.path.isdir(args.json_file) or (
+        not os.path.isfile(args.json_file) and any(char in args.json_file for char in '*?['))
+
     print(f"\n{'=' * 80}")
     print(f"DICOMDoseExcel - Conversor de Relatórios JSON DICOM para Excel")
     print(f"{'=' * 80}")
     print(f"Arquivo JSON: {args.json_file}")
-    print(f"Arquivo Excel: {args.output}")
+    if multiple_files:
+        print(f"Arquivo Excel: <nome do JSON>.xlsx (ao lado de cada JSON)")
+    else:
+        print(f"Arquivo Excel: {args.output or 'ct_dose_dicom_report.xlsx'}")
     print(f"{'=' * 80}\n")
 
+    if multiple_files:
+        # Vários arquivos: converte em paralelo; --output não se aplica
+        if args.output:
+            print(f"⚠️ --output ignorado com vários arquivos: {args.output}")
+
+        pattern = os.path.join(args.json_file, '*.json') if os.path.isdir(args.json_file) else args.json_file
+        json_files = sorted(glob.glob(pattern))
+
+        if not json_files:
+            print(f"❌ Nenhum arquivo JSON encontrado: {args.json_file}")
+        else:
+            print(f"📂 {len(json_files)} arquivos JSON encontrados, convertendo em paralelo")
+            convert_many(json_files, args.engine)
+
     # Verifica se arquivo existe
-    if not os.path.exists(args.json_file):
+    elif not os.path.exists(args.json_file):
         print(f"❌ Arquivo JSON não encontrado: {args.json_file}")
     else:
-        json_to_excel(args.json_file, args.output)
+        json_to_excel(args.json_file, args.output or 'ct_dose_dicom_report.xlsx', args.engine)
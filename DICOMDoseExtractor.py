@@ -10,18 +10,85 @@ import pydicom
 import os
 import argparse
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from pydicom.filereader import read_partial
+from pydicom.tag import Tag
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.dimensions import ColumnDimension
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+
+
+# Tags de nível superior usados na planilha (os demais elementos não são lidos)
+EXCEL_TAGS = [
+    'Modality', 'PatientID', 'PatientName', 'PatientSex', 'PatientBirthDate',
+    'StudyDate', 'StudyTime', 'ContentSequence',
+]
+
+# Nomes de arquivo comuns em pastas de exames que nunca são DICOM (imagens, documentos, lixo do SO)
+NON_DICOM_NAME_PATTERN = re.compile(
+    r'\.(jpe?g|png|gif|bmp|pdf|xml|json|txt|csv|xlsx?|zip|gz|tgz|db|ini)$|^\.DS_Store$|^Thumbs\.db$',
+    re.IGNORECASE)
+
+# Nomes de meses (abreviados e completos) para o parser de "May 5, 2025"
+MONTH_NUMBERS = {
+    name: number
+    for number, full_name in enumerate(('January', 'February', 'March', 'April', 'May', 'June', 'July',
+                                        'August', 'September', 'October', 'November', 'December'), 1)
+    for name in (full_name, full_name[:3])
+}
+
+
+def _parse_month_day_year(date_str):
+    """Parser para "May 5, 2025" (o horário após a data, se houver, é ignorado)"""
+    parts = date_str.split(',', 2)
+    if len(parts) < 2:
+        return None
+
+    month_day = parts[0].split()
+    year = parts[1].strip()
+    if len(month_day) != 2 or len(year) != 4:
+        return None
+
+    month = MONTH_NUMBERS.get(month_day[0])
+    if month is None:
+        return None
+
+    try:
+        return datetime(int(year), month, int(month_day[1]))
+    except ValueError:
+        return None
+
+
+# Erros possíveis ao ler elementos de um dataset malformado (item ausente, valor inválido)
+DATASET_ERRORS = (AttributeError, IndexError, KeyError, TypeError, ValueError)
+
+# Tag Modality (0008,0060): a verificação do arquivo lê o cabeçalho só até ela
+MODALITY_TAG = Tag(0x0008, 0x0060)
+
+
+def _past_modality(tag, vr, length) -> bool:
+    """Critério de parada de read_partial: para no primeiro elemento após a Modality"""
+    return tag > MODALITY_TAG
 
 
 class DICOMDirectExcelExtractor:
     """Extrator direto de DICOM SR para Excel"""
 
+    # Formatos de data aceitos no cálculo da idade (criados uma vez, não a cada chamada)
+    DATE_FORMATS = ('%b %d, %Y', '%B %d, %Y', '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y')
+    EXAM_FORMATS = DATE_FORMATS + ('%b %d, %Y, %I:%M:%S %p', '%B %d, %Y, %I:%M:%S %p')
+
+    # Abreviações dos meses (índice = número do mês)
+    MONTHS = ('', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
     def __init__(self):
         # Códigos DICOM essenciais (apenas os que usamos)
         self.concept_codes = {
             # Dados de irradiação
+            'accumulated_dose': '113811',
             'total_dlp': '113813',
 
             # Aquisição CT
@@ -29,6 +96,7 @@ class DICOMDirectExcelExtractor:
             'acquisition_protocol': '125203',
             'acquisition_type': '113820',
             'comment': '121106',
+            'acquisition_params': '113822',
 
             # Parâmetros da fonte de raios-X
             'xray_source_params': '113831',
@@ -44,24 +112,48 @@ class DICOMDirectExcelExtractor:
         }
 
     def find_dicom_files_recursive(self, root_path: str, debug_mode: bool = False) -> list:
-        """Busca recursivamente por arquivos DICOM SR"""
+        """
+        Busca recursivamente por arquivos DICOM SR com os.scandir (o tipo e, no Windows,
+        o tamanho de cada entrada vêm da própria listagem), na ordem de visita do os.walk
+        """
         dicom_files = []
 
         if debug_mode:
             print(f"🔍 Buscando arquivos DICOM em: {root_path}")
 
         try:
-            for root, dirs, files in os.walk(root_path):
-                if root == root_path:
+            # (pasta, é a raiz?)
+            pending = [(root_path, True)]
+            while pending:
+                folder, is_root = pending.pop()
+                try:
+                    with os.scandir(folder) as it:
+                        entries = list(it)
+                except OSError:
                     continue
 
-                for file in files:
-                    file_path = os.path.join(root, file)
+                subfolders = []
+                for entry in entries:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subfolders.append((entry.path, False))
+                        continue
+
+                    # Ignora os arquivos da própria pasta raiz: só as subpastas são varridas
+                    if is_root:
+                        continue
 
-                    if self.is_dicom_sr_file(file_path):
-                        dicom_files.append(file_path)
+                    # Descarta pelo nome, sem abrir, arquivos que claramente não são DICOM
+                    if NON_DICOM_NAME_PATTERN.search(entry.name):
+                        continue
+
+                    if self.is_dicom_sr_file(entry):
+                        dicom_files.append(entry.path)
                         if debug_mode:
-                            print(f"  ✓ DICOM encontrado: {file_path}")
+                            print(f"  ✓ DICOM encontrado: {entry.path}")
+
+                # Pré-ordem, na ordem da listagem
+                pending.extend(reversed(subfolders))
 
         except Exception as e:
             if debug_mode:
@@ -69,24 +161,33 @@ class DICOMDirectExcelExtractor:
 
         return dicom_files
 
-    def is_dicom_sr_file(self, file_path: str) -> bool:
-        """Verifica se é um DICOM SR válido rapidamente"""
+    def is_dicom_sr_file(self, file_path) -> bool:
+        """
+        Verifica se é um DICOM SR válido rapidamente.
+        Aceita um caminho ou uma entrada de os.scandir (reaproveita o stat em cache).
+        """
         try:
-            if not os.path.isfile(file_path) or os.path.getsize(file_path) < 132:
+            if isinstance(file_path, os.DirEntry):
+                if not file_path.is_file() or file_path.stat().st_size < 132:
+                    return False
+                file_path = file_path.path
+            elif not os.path.isfile(file_path) or os.path.getsize(file_path) < 132:
                 return False
 
-            # Verifica prefixo DICM
             with open(file_path, 'rb') as f:
-                f.seek(128)
-                if f.read(4) != b'DICM':
+                # Verifica prefixo DICM (preâmbulo + prefixo lidos em uma única leitura)
+                if f.read(132)[128:] != b'DICM':
                     return False
 
-            # Leitura mínima para verificar se é SR
-            ds = pydicom.dcmread(file_path, stop_before_pixels=True, force=True)
-            return (hasattr(ds, 'Modality') and ds.Modality == 'SR' and
-                    hasattr(ds, 'ContentSequence'))
+                # Leitura mínima (só até a Modality, no mesmo arquivo aberto) para verificar se é SR;
+                # o dataset completo é lido uma única vez, em extract_excel_data, que também
+                # verifica a presença da ContentSequence
+                f.seek(0)
+                ds = read_partial(f, stop_when=_past_modality, force=True)
 
-        except:
+            return getattr(ds, 'Modality', None) == 'SR'
+
+        except Exception:
             return False
 
     def calculate_age(self, birth_date_str: str, exam_date_str: str):
@@ -98,22 +199,23 @@ class DICOMDirectExcelExtractor:
             birth_date = None
             exam_date = None
 
-            # Formatos de data
-            date_formats = ['%b %d, %Y', '%B %d, %Y', '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y']
-            exam_formats = date_formats + ['%b %d, %Y, %I:%M:%S %p', '%B %d, %Y, %I:%M:%S %p']
-
-            # Parse data nascimento
-            for fmt in date_formats:
+            # Parse data nascimento ("Jun 15, 1980" direto; demais formatos via strptime)
+            birth_text = birth_date_str.strip()
+            birth_date = _parse_month_day_year(birth_text)
+            for fmt in self.DATE_FORMATS if birth_date is None else ():
                 try:
-                    birth_date = datetime.strptime(birth_date_str.strip(), fmt)
+                    birth_date = datetime.strptime(birth_text, fmt)
                     break
                 except ValueError:
                     continue
 
-            # Parse data exame
-            for fmt in exam_formats:
+            # Parse data exame ("May 28, 2024, 14:30:15" direto: o horário em 24h não casa
+            # com os formatos %I:%M:%S %p do strptime)
+            exam_text = exam_date_str.strip()
+            exam_date = _parse_month_day_year(exam_text)
+            for fmt in self.EXAM_FORMATS if exam_date is None else ():
                 try:
-                    exam_date = datetime.strptime(exam_date_str.strip(), fmt)
+                    exam_date = datetime.strptime(exam_text, fmt)
                     break
                 except ValueError:
                     continue
@@ -135,7 +237,7 @@ class DICOMDirectExcelExtractor:
                     age -= 1
                 return age
 
-        except:
+        except ValueError:
             pass
 
         return '-'
@@ -150,25 +252,27 @@ class DICOMDirectExcelExtractor:
             month = date_str[4:6]
             day = date_str[6:8]
 
-            months = ['', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            month_name = months[int(month)]
+            month_name = self.MONTHS[int(month)]
             return f"{month_name} {int(day)}, {year}"
-        except:
+        except (ValueError, IndexError):
             return date_str
 
-    def find_content_by_code(self, content_sequence, code_value: str):
-        """Encontra item por código DICOM"""
+    @staticmethod
+    def index_by_code(content_sequence, repeated: dict = None) -> dict:
+        """
+        Indexa os itens de uma ContentSequence pelo código do conceito.
+        Em caso de códigos repetidos, mantém o primeiro item;
+        os códigos presentes em `repeated` (código -> lista) têm todos os itens acumulados na lista.
+        """
+        index = {}
         for item in content_sequence:
-            try:
-                if (hasattr(item, 'ConceptNameCodeSequence') and
-                        item.ConceptNameCodeSequence):
-                    concept_code = getattr(item.ConceptNameCodeSequence[0], 'CodeValue', '')
-                    if concept_code == code_value:
-                        return item
-            except:
-                continue
-        return None
+            concept_names = getattr(item, 'ConceptNameCodeSequence', None)
+            if concept_names:
+                code = getattr(concept_names[0], 'CodeValue', '')
+                index.setdefault(code, item)
+                if repeated and code in repeated:
+                    repeated[code].append(item)
+        return index
 
     def get_text_value(self, content_item) -> str:
         """Extrai valor de texto"""
@@ -179,7 +283,7 @@ class DICOMDirectExcelExtractor:
         try:
             if hasattr(content_item, 'ConceptCodeSequence') and content_item.ConceptCodeSequence:
                 return getattr(content_item.ConceptCodeSequence[0], 'CodeMeaning', '')
-        except:
+        except DATASET_ERRORS:
             pass
         return ""
 
@@ -200,18 +304,40 @@ class DICOMDirectExcelExtractor:
                     return f"{numeric_value} {unit}"
                 elif numeric_value:
                     return str(numeric_value)
-        except:
+        except DATASET_ERRORS:
             pass
         return ""
 
-    def extract_excel_data(self, dicom_path: str) -> list:
-        """Extrai apenas os dados necessários para o Excel"""
+    def extract_excel_data(self, dicom_path: str):
+        """
+        Extrai apenas os dados necessários para o Excel.
+        Retorna None se o arquivo não é um relatório de dose (SR sem ContentSequence),
+        e uma lista vazia em caso de falha na extração.
+        """
         try:
-            ds = pydicom.dcmread(dicom_path)
+            ds = pydicom.dcmread(dicom_path, specific_tags=EXCEL_TAGS, stop_before_pixels=True)
 
             if (not hasattr(ds, 'Modality') or ds.Modality != 'SR' or
                     not hasattr(ds, 'ContentSequence')):
-                return []
+                return None
+
+            # Códigos resolvidos uma vez, fora dos loops
+            codes = self.concept_codes
+            accumulated_code = codes['accumulated_dose']
+            total_dlp_code = codes['total_dlp']
+            acquisition_code = codes['ct_acquisition']
+            protocol_code = codes['acquisition_protocol']
+            comment_code = codes['comment']
+            type_code = codes['acquisition_type']
+            params_code = codes['acquisition_params']
+            dose_code = codes['ct_dose']
+            ctdivol_code = codes['mean_ctdivol']
+            dlp_code = codes['dlp']
+            phantom_code = codes['phantom_type']
+            ssde_code = codes['ssde']
+            xray_code = codes['xray_source_params']
+            current_code = codes['tube_current']
+            kvp_code = codes['kvp']
 
             # Dados básicos do paciente
             patient_id = str(getattr(ds, 'PatientID', ''))
@@ -236,168 +362,131 @@ class DICOMDirectExcelExtractor:
             age_value = int(age) if isinstance(age, int) or (isinstance(age, str) and age.isdigit()) else age
 
             # Patient ID como número se possível
-            patient_id_value = int(patient_id) if patient_id and patient_id.isdigit() else (
+            patient_id_value = int(patient_id) if patient_id and patient_id.isascii() and patient_id.isdigit() else (
                 patient_id if patient_id else '-')
 
+            # Sequência principal indexada em uma única passada; os containers de aquisição
+            # (código repetido) são separados na mesma passada
+            acquisition_items = []
+            main_index = self.index_by_code(ds.ContentSequence, {acquisition_code: acquisition_items})
+
             # DLP total
             total_dlp = ''
-            main_content = ds.ContentSequence
-
-            # Procura DLP total
-            for item in main_content:
-                try:
-                    if (hasattr(item, 'ConceptNameCodeSequence') and
-                            item.ConceptNameCodeSequence and
-                            getattr(item.ConceptNameCodeSequence[0], 'CodeValue', '') == '113811'):
-
-                        if hasattr(item, 'ContentSequence'):
-                            dlp_item = self.find_content_by_code(item.ContentSequence, self.concept_codes['total_dlp'])
-                            if dlp_item:
-                                total_dlp = self.get_numeric_value_with_unit(dlp_item)
-                        break
-                except:
-                    continue
+            accumulated_content = getattr(main_index.get(accumulated_code), 'ContentSequence', None)
+            if accumulated_content is not None:
+                dlp_item = self.index_by_code(accumulated_content).get(total_dlp_code)
+                if dlp_item:
+                    total_dlp = self.get_numeric_value_with_unit(dlp_item)
 
             # Extrai aquisições
             excel_rows = []
-            acquisitions_found = False
+            acquisitions_found = bool(acquisition_items)
 
-            for item in main_content:
+            for item in acquisition_items:
                 try:
-                    if (hasattr(item, 'ConceptNameCodeSequence') and
-                            item.ConceptNameCodeSequence and
-                            getattr(item.ConceptNameCodeSequence[0], 'CodeValue', '') == self.concept_codes[
-                                'ct_acquisition']):
-
-                        acquisitions_found = True
-
-                        if hasattr(item, 'ContentSequence'):
-                            acq_content = item.ContentSequence
-
-                            # Dados da aquisição
-                            protocol = ''
-                            comment = ''
-                            acquisition_type = ''
-                            phantom_type = ''
-                            ctdivol = ''
-                            dlp = ''
-                            ssde = ''
-                            tube_current = ''
-                            kvp = ''
-
-                            # Protocol
-                            protocol_item = self.find_content_by_code(acq_content,
-                                                                      self.concept_codes['acquisition_protocol'])
-                            if protocol_item:
-                                protocol = self.get_text_value(protocol_item)
-
-                            # Comment
-                            comment_item = self.find_content_by_code(acq_content, self.concept_codes['comment'])
-                            if comment_item:
-                                comment = self.get_text_value(comment_item)
-
-                            # Acquisition Type
-                            type_item = self.find_content_by_code(acq_content, self.concept_codes['acquisition_type'])
-                            if type_item:
-                                acquisition_type = self.get_code_meaning(type_item)
-
-                            # Procura por sub-containers (dose e xray params)
-                            for sub_item in acq_content:
-                                try:
-                                    if (hasattr(sub_item, 'ConceptNameCodeSequence') and
-                                            sub_item.ConceptNameCodeSequence):
-
-                                        code = getattr(sub_item.ConceptNameCodeSequence[0], 'CodeValue', '')
-
-                                        # CT Dose
-                                        if code == self.concept_codes['ct_dose'] and hasattr(sub_item,
-                                                                                             'ContentSequence'):
-                                            dose_content = sub_item.ContentSequence
-
-                                            # CTDIvol
-                                            ctdivol_item = self.find_content_by_code(dose_content,
-                                                                                     self.concept_codes['mean_ctdivol'])
-                                            if ctdivol_item:
-                                                ctdivol = self.get_numeric_value_with_unit(ctdivol_item)
-
-                                            # DLP
-                                            dlp_item = self.find_content_by_code(dose_content,
-                                                                                 self.concept_codes['dlp'])
-                                            if dlp_item:
-                                                dlp = self.get_numeric_value_with_unit(dlp_item)
-
-                                            # Phantom Type
-                                            phantom_item = self.find_content_by_code(dose_content,
-                                                                                     self.concept_codes['phantom_type'])
-                                            if phantom_item:
-                                                phantom_type = self.get_code_meaning(phantom_item)
-
-                                            # SSDE
-                                            ssde_item = self.find_content_by_code(dose_content,
-                                                                                  self.concept_codes['ssde'])
-                                            if ssde_item:
-                                                ssde = self.get_numeric_value_with_unit(ssde_item)
-
-                                        # X-Ray Source Params (dentro de acquisition params)
-                                        elif hasattr(sub_item, 'ContentSequence'):
-                                            for param_item in sub_item.ContentSequence:
-                                                if (hasattr(param_item, 'ConceptNameCodeSequence') and
-                                                        param_item.ConceptNameCodeSequence and
-                                                        getattr(param_item.ConceptNameCodeSequence[0], 'CodeValue',
-                                                                '') ==
-                                                        self.concept_codes['xray_source_params'] and
-                                                        hasattr(param_item, 'ContentSequence')):
-
-                                                    xray_content = param_item.ContentSequence
-
-                                                    # Tube Current
-                                                    current_item = self.find_content_by_code(xray_content,
-                                                                                             self.concept_codes[
-                                                                                                 'tube_current'])
-                                                    if current_item:
-                                                        tube_current = self.get_numeric_value_with_unit(current_item)
-
-                                                    # kVp
-                                                    kvp_item = self.find_content_by_code(xray_content,
-                                                                                         self.concept_codes['kvp'])
-                                                    if kvp_item:
-                                                        kvp = self.get_numeric_value_with_unit(kvp_item)
-
-                                                    break
-                                except:
-                                    continue
-
-                            # Tratamento de valores vazios
-                            def safe_value(val):
-                                return val if val else '-'
-
-                            # Tratamento especial para comment
-                            comment_value = comment if comment and comment.strip() and comment != 'null' else '-'
-
-                            # Cria linha para Excel
-                            excel_row = [
-                                patient_id_value,  # ID do paciente
-                                patient_name or '-',  # Nome do paciente
-                                sex or '-',  # Sexo
-                                birth_date or '-',  # Data de nascimento
-                                age_value,  # Idade
-                                protocol or '-',  # Pesquisa de interesse
-                                study_date or '-',  # Data do exame
-                                comment_value,  # Descrição da série
-                                acquisition_type or '-',  # Scan mode
-                                tube_current or '-',  # mAs
-                                kvp or '-',  # kV
-                                ctdivol or '-',  # CTDIvol
-                                dlp or '-',  # DLP
-                                total_dlp or '-',  # DLP total
-                                phantom_type or '-',  # Phantom type
-                                ssde or '-',  # SSDE
-                                '-'  # Avg scan size (não disponível)
-                            ]
-
-                            excel_rows.append(excel_row)
-
-                except:
+                    acq_content = getattr(item, 'ContentSequence', None)
+                    if acq_content is None:
+                        continue
+
+                    # Dados da aquisição
+                    protocol = ''
+                    comment = ''
+                    acquisition_type = ''
+                    phantom_type = ''
+                    ctdivol = ''
+                    dlp = ''
+                    ssde = ''
+                    tube_current = ''
+                    kvp = ''
+
+                    # Itens da aquisição indexados pelo código (uma única passada)
+                    acq_index = self.index_by_code(acq_content)
+
+                    # Protocol
+                    protocol_item = acq_index.get(protocol_code)
+                    if protocol_item:
+                        protocol = self.get_text_value(protocol_item)
+
+                    # Comment
+                    comment_item = acq_index.get(comment_code)
+                    if comment_item:
+                        comment = self.get_text_value(comment_item)
+
+                    # Acquisition Type
+                    type_item = acq_index.get(type_code)
+                    if type_item:
+                        acquisition_type = self.get_code_meaning(type_item)
+
+                    # CT Dose
+                    dose_content = getattr(acq_index.get(dose_code), 'ContentSequence', None)
+                    if dose_content is not None:
+                        dose_index = self.index_by_code(dose_content)
+
+                        # CTDIvol
+                        ctdivol_item = dose_index.get(ctdivol_code)
+                        if ctdivol_item:
+                            ctdivol = self.get_numeric_value_with_unit(ctdivol_item)
+
+                        # DLP
+                        dlp_item = dose_index.get(dlp_code)
+                        if dlp_item:
+                            dlp = self.get_numeric_value_with_unit(dlp_item)
+
+                        # Phantom Type
+                        phantom_item = dose_index.get(phantom_code)
+                        if phantom_item:
+                            phantom_type = self.get_code_meaning(phantom_item)
+
+                        # SSDE
+                        ssde_item = dose_index.get(ssde_code)
+                        if ssde_item:
+                            ssde = self.get_numeric_value_with_unit(ssde_item)
+
+                    # X-Ray Source Params (dentro de acquisition params)
+                    params_content = getattr(acq_index.get(params_code), 'ContentSequence', None)
+                    if params_content is not None:
+                        xray_content = getattr(self.index_by_code(params_content).get(xray_code),
+                                               'ContentSequence', None)
+                        if xray_content is not None:
+                            xray_index = self.index_by_code(xray_content)
+
+                            # Tube Current
+                            current_item = xray_index.get(current_code)
+                            if current_item:
+                                tube_current = self.get_numeric_value_with_unit(current_item)
+
+                            # kVp
+                            kvp_item = xray_index.get(kvp_code)
+                            if kvp_item:
+                                kvp = self.get_numeric_value_with_unit(kvp_item)
+
+                    # Tratamento especial para comment
+                    comment_value = comment if comment and comment.strip() and comment != 'null' else '-'
+
+                    # Cria linha para Excel
+                    excel_row = [
+                        patient_id_value,  # ID do paciente
+                        patient_name or '-',  # Nome do paciente
+                        sex or '-',  # Sexo
+                        birth_date or '-',  # Data de nascimento
+                        age_value,  # Idade
+                        protocol or '-',  # Pesquisa de interesse
+                        study_date or '-',  # Data do exame
+                        comment_value,  # Descrição da série
+                        acquisition_type or '-',  # Scan mode
+                        tube_current or '-',  # mAs
+                        kvp or '-',  # kV
+                        ctdivol or '-',  # CTDIvol
+                        dlp or '-',  # DLP
+                        total_dlp or '-',  # DLP total
+                        phantom_type or '-',  # Phantom type
+                        ssde or '-',  # SSDE
+                        '-'  # Avg scan size (não disponível)
+                    ]
+
+                    excel_rows.append(excel_row)
+
+                except DATASET_ERRORS:
                     continue
 
             # Se não encontrou aquisições, cria linha básica
@@ -428,10 +517,9 @@ class DICOMDirectExcelExtractor:
         print(f"📊 Encontrados {len(dicom_files)} arquivos DICOM")
         print(f"📄 Gerando Excel: {output_file}")
 
-        # Cria planilha Excel
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Relatórios DICOM CT"
+        # Cria planilha Excel (modo write-only: as linhas são gravadas em streaming)
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Relatórios DICOM CT")
 
         # Cabeçalhos
         headers = [
@@ -449,50 +537,70 @@ class DICOMDirectExcelExtractor:
             top=Side(style='thin'), bottom=Side(style='thin')
         )
 
+        # Estilo nomeado único para as linhas de dados (evita clonar a borda célula a célula)
+        wb.add_named_style(NamedStyle(name="dicom_row", border=border))
+
+        # Define larguras das colunas (em modo write-only, antes do primeiro append)
+        column_widths = [15, 25, 10, 18, 10, 20, 18, 20, 15, 10, 10, 10, 10, 10, 15, 10, 15]
+        for i, width in enumerate(column_widths, 1):
+            ws.column_dimensions[chr(64 + i)] = ColumnDimension(ws, index=chr(64 + i), width=width)
+
         # Adiciona cabeçalhos
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_idx, value=header)
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
             cell.fill = header_fill
             cell.font = header_font
             cell.alignment = header_alignment
             cell.border = border
-
-        # Define larguras das colunas
-        column_widths = [15, 25, 10, 18, 10, 20, 18, 20, 15, 10, 10, 10, 10, 10, 15, 10, 15]
-        for i, width in enumerate(column_widths, 1):
-            ws.column_dimensions[chr(64 + i)].width = width
+            header_cells.append(cell)
+        ws.append(header_cells)
 
         # Processa arquivos DICOM
         row_idx = 2
         processed_count = 0
         error_count = 0
+        skipped_count = 0
+
+        # A leitura dos DICOMs roda em paralelo; a planilha é preenchida só neste processo,
+        # com as linhas chegando na ordem original
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(_extract_excel_rows, dicom_files, chunksize=16)
+
+            for i, (dicom_file, excel_rows) in enumerate(zip(dicom_files, results), 1):
+                # SR sem ContentSequence: não é um relatório de dose, ignorado sem contar como erro
+                if excel_rows is None:
+                    skipped_count += 1
+                    if debug_mode:
+                        print(f"  ⏭️ Ignorado (não é um relatório de dose): {os.path.relpath(dicom_file, root_path)}")
+                    continue
 
-        for i, dicom_file in enumerate(dicom_files, 1):
-            try:
-                print(f"📄 Processando {i}/{len(dicom_files)}: {os.path.relpath(dicom_file, root_path)}")
-
-                excel_rows = self.extract_excel_data(dicom_file)
-
-                if excel_rows:
-                    for excel_row in excel_rows:
-                        # Insere dados na planilha
-                        for col_idx, value in enumerate(excel_row, 1):
-                            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                            cell.border = border
-                        row_idx += 1
-                    processed_count += 1
-
-                    if not debug_mode:
-                        # Mostra info básica
-                        patient_info = f"Patient: {excel_rows[0][0]}" if excel_rows[0][0] != '-' else "No Patient ID"
-                        print(f"  ✓ {patient_info}, {len(excel_rows)} aquisições")
-                else:
+                try:
+                    print(f"📄 Processando {i}/{len(dicom_files)}: {os.path.relpath(dicom_file, root_path)}")
+
+                    if excel_rows:
+                        for excel_row in excel_rows:
+                            # Insere dados na planilha
+                            row_cells = []
+                            for value in excel_row:
+                                cell = WriteOnlyCell(ws, value=value)
+                                cell.style = "dicom_row"
+                                row_cells.append(cell)
+                            ws.append(row_cells)
+                            row_idx += 1
+                        processed_count += 1
+
+                        if not debug_mode:
+                            # Mostra info básica
+                            patient_info = f"Patient: {excel_rows[0][0]}" if excel_rows[0][0] != '-' else "No Patient ID"
+                            print(f"  ✓ {patient_info}, {len(excel_rows)} aquisições")
+                    else:
+                        error_count += 1
+                        print(f"  ❌ Falha na extração")
+
+                except Exception as e:
                     error_count += 1
-                    print(f"  ❌ Falha na extração")
-
-            except Exception as e:
-                error_count += 1
-                print(f"  ❌ Erro: {str(e)}")
+                    print(f"  ❌ Erro: {str(e)}")
 
         # Salva Excel
         try:
@@ -502,7 +610,7 @@ class DICOMDirectExcelExtractor:
             print(f"✅ EXCEL GERADO COM SUCESSO!")
             print(f"{'=' * 80}")
             print(f"Arquivo: {output_file}")
-            print(f"Arquivos processados: {processed_count}/{len(dicom_files)}")
+            print(f"Arquivos processados: {processed_count}/{len(dicom_files) - skipped_count}")
             print(f"Erros: {error_count}")
             print(f"Total de linhas: {row_idx - 2}")
             print(f"{'=' * 80}")
@@ -514,6 +622,11 @@ class DICOMDirectExcelExtractor:
             return False
 
 
+def _extract_excel_rows(dicom_path: str):
+    """Extrai as linhas do Excel de um único arquivo DICOM (executado em um processo do pool)"""
+    return DICOMDirectExcelExtractor().extract_excel_data(dicom_path)
+
+
 def main():
     """Função principal"""
     parser = argparse.ArgumentParser(
@@ -8,14 +8,64 @@ informações essenciais diretamente, gerando JSON consolidado.
 
 import pydicom
 import os
+import io
 import json
 import argparse
+import math
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
+from pydicom.filereader import read_partial
+from pydicom.tag import Tag
 
+try:
+    import orjson  # Opcional: serialização do JSON consolidado mais rápida
+except ImportError:
+    orjson = None
 
-@dataclass
+
+# Tags de nível superior usados na extração (os demais elementos não são lidos)
+REPORT_TAGS = [
+    'PatientID', 'PatientName', 'PatientBirthDate', 'PatientSex',
+    'StudyID', 'AccessionNumber', 'StudyDate', 'StudyTime',
+    'InstitutionName', 'ContentDate', 'ContentTime',
+    'Modality', 'SOPClassUID', 'ContentSequence',
+]
+
+# Nomes de arquivo comuns em pastas de exames que nunca são DICOM (imagens, documentos, lixo do SO)
+NON_DICOM_NAME_PATTERN = re.compile(
+    r'\.(jpe?g|png|gif|bmp|pdf|xml|json|txt|csv|xlsx?|zip|gz|tgz|db|ini)$|^\.DS_Store$|^Thumbs\.db$',
+    re.IGNORECASE)
+
+# Tag Modality (0008,0060): a leitura do cabeçalho para logo após ela
+MODALITY_TAG = Tag(0x0008, 0x0060)
+
+
+def _past_modality(tag, vr, length) -> bool:
+    """Critério de parada de read_partial: para no primeiro elemento após a Modality"""
+    return tag > MODALITY_TAG
+
+
+# Dataclasses com __slots__ (menos memória por instância) quando suportado (Python 3.10+)
+report_dataclass = dataclass(slots=True) if sys.version_info >= (3, 10) else dataclass
+
+# Abreviações dos meses (índice = número do mês)
+MONTHS = ('', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+@report_dataclass
 class EssentialInfo:
     """Informações essenciais extraídas do DICOM"""
     patient_id: str = ""
@@ -26,8 +76,19 @@ class EssentialInfo:
     birth_date: str = ""
     sex: str = ""
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'patient_id': self.patient_id,
+            'patient_name': self.patient_name,
+            'study_id': self.study_id,
+            'accession_number': self.accession_number,
+            'study_date': self.study_date,
+            'birth_date': self.birth_date,
+            'sex': self.sex,
+        }
+
 
-@dataclass
+@report_dataclass
 class XRaySourceParams:
     """Parâmetros da fonte de raios-X"""
     identification: str = ""
@@ -36,8 +97,17 @@ class XRaySourceParams:
     tube_current: str = ""
     exposure_time_per_rotation: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'identification': self.identification,
+            'kvp': self.kvp,
+            'max_tube_current': self.max_tube_current,
+            'tube_current': self.tube_current,
+            'exposure_time_per_rotation': self.exposure_time_per_rotation,
+        }
+
 
-@dataclass
+@report_dataclass
 class CTDose:
     """Dados de dose CT"""
     mean_ctdivol: str = ""
@@ -46,8 +116,17 @@ class CTDose:
     size_specific_dose: Optional[str] = None
     ctdivol_alert_value: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'mean_ctdivol': self.mean_ctdivol,
+            'phantom_type': self.phantom_type,
+            'dlp': self.dlp,
+            'size_specific_dose': self.size_specific_dose,
+            'ctdivol_alert_value': self.ctdivol_alert_value,
+        }
+
 
-@dataclass
+@report_dataclass
 class CTAcquisitionParams:
     """Parâmetros de aquisição CT"""
     exposure_time: str = ""
@@ -57,8 +136,18 @@ class CTAcquisitionParams:
     num_xray_sources: str = ""
     pitch_factor: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'exposure_time': self.exposure_time,
+            'scanning_length': self.scanning_length,
+            'nominal_single_collimation': self.nominal_single_collimation,
+            'nominal_total_collimation': self.nominal_total_collimation,
+            'num_xray_sources': self.num_xray_sources,
+            'pitch_factor': self.pitch_factor,
+        }
+
 
-@dataclass
+@report_dataclass
 class CTAcquisition:
     """Dados de uma aquisição CT"""
     protocol: str = ""
@@ -71,17 +160,40 @@ class CTAcquisition:
     xray_source_params: XRaySourceParams = None
     ct_dose: CTDose = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'protocol': self.protocol,
+            'target_region': self.target_region,
+            'acquisition_type': self.acquisition_type,
+            'procedure_context': self.procedure_context,
+            'irradiation_event_uid': self.irradiation_event_uid,
+            'comment': self.comment,
+            'acquisition_params': self.acquisition_params.to_dict() if self.acquisition_params is not None else None,
+            'xray_source_params': self.xray_source_params.to_dict() if self.xray_source_params is not None else None,
+            'ct_dose': self.ct_dose.to_dict() if self.ct_dose is not None else None,
+        }
+
 
-@dataclass
+@report_dataclass
 class IrradiationInfo:
     """Informações de irradiação acumulada"""
     start_time: str = ""
     end_time: str = ""
     total_events: str = ""
     total_dlp: str = ""
+    total_dlp_value: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'total_events': self.total_events,
+            'total_dlp': self.total_dlp,
+            'total_dlp_value': self.total_dlp_value,
+        }
 
 
-@dataclass
+@report_dataclass
 class DeviceInfo:
     """Informações do equipamento"""
     observer_name: str = ""
@@ -90,86 +202,137 @@ class DeviceInfo:
     serial_number: str = ""
     physical_location: str = ""
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'observer_name': self.observer_name,
+            'manufacturer': self.manufacturer,
+            'model_name': self.model_name,
+            'serial_number': self.serial_number,
+            'physical_location': self.physical_location,
+        }
+
 
-@dataclass
+@report_dataclass
 class CTScanReport:
     """Relatório completo de dose CT"""
     hospital: str = ""
     report_date: str = ""
     file_path: str = ""
-    essential: EssentialInfo = None
-    device: DeviceInfo = None
-    irradiation: IrradiationInfo = None
-    acquisitions: List[CTAcquisition] = None
-
-    def __post_init__(self):
-        if self.essential is None:
-            self.essential = EssentialInfo()
-        if self.device is None:
-            self.device = DeviceInfo()
-        if self.irradiation is None:
-            self.irradiation = IrradiationInfo()
-        if self.acquisitions is None:
-            self.acquisitions = []
+    essential: EssentialInfo = field(default_factory=EssentialInfo)
+    device: DeviceInfo = field(default_factory=DeviceInfo)
+    irradiation: IrradiationInfo = field(default_factory=IrradiationInfo)
+    acquisitions: List[CTAcquisition] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'hospital': self.hospital,
+            'report_date': self.report_date,
+            'file_path': self.file_path,
+            'essential': self.essential.to_dict(),
+            'device': self.device.to_dict(),
+            'irradiation': self.irradiation.to_dict(),
+            'acquisitions': [acquisition.to_dict() for acquisition in self.acquisitions],
+        }
+
+
+@lru_cache(maxsize=4096)
+def format_datetime(dt_str: str) -> str:
+    """Converte DICOM datetime para formato legível"""
+    if not dt_str:
+        return ""
+
+    # DICOM datetime format: YYYYMMDDHHMMSS.FFFFFF
+    dt_part = dt_str.partition('.')[0]
+
+    if len(dt_part) >= 14:
+        return f"{dt_part[:4]}-{dt_part[4:6]}-{dt_part[6:8]} {dt_part[8:10]}:{dt_part[10:12]}:{dt_part[12:14]}"
+    if len(dt_part) >= 8:
+        return f"{dt_part[:4]}-{dt_part[4:6]}-{dt_part[6:8]}"
+
+    return dt_str
+
+
+@lru_cache(maxsize=4096)
+def format_date(date_str: str) -> str:
+    """Converte DICOM date para formato legível"""
+    if not date_str or len(date_str) < 8:
+        return ""
+
+    # Valida os dígitos (só ASCII: '²' passa no isdigit, mas não no int()) em vez de
+    # depender de exceções no int()
+    if not (date_str[:8].isascii() and date_str[:8].isdigit()):
+        return date_str
+
+    month = int(date_str[4:6])
+    if month > 12:
+        return date_str
+
+    # Converte para formato mais legível
+    return f"{MONTHS[month]} {int(date_str[6:8])}, {date_str[:4]}"
+
+
+class NotDoseReportError(Exception):
+    """O arquivo é um DICOM SR, mas não um relatório de dose (sem ContentSequence)"""
 
 
 class DICOMDoseExtractor:
     """Extrator de dados de dose diretamente de arquivos DICOM SR"""
 
-    def __init__(self):
-        # Códigos DICOM para identificação dos campos
-        self.concept_codes = {
-            # Contexto do dispositivo
-            'device_observer_name': '121013',
-            'device_observer_manufacturer': '121014',
-            'device_observer_model': '121015',
-            'device_observer_serial': '121016',
-            'device_observer_location': '121017',
-
-            # Dados de irradiação
-            'start_irradiation': '113809',
-            'end_irradiation': '113810',
-            'total_events': '113812',
-            'total_dlp': '113813',
-
-            # Aquisição CT
-            'ct_acquisition': '113819',
-            'acquisition_protocol': '125203',
-            'target_region': '123014',
-            'acquisition_type': '113820',
-            'procedure_context': 'G-C32C',
-            'irradiation_event_uid': '113769',
-            'comment': '121106',
-
-            # Parâmetros de aquisição
-            'acquisition_params': '113822',
-            'exposure_time': '113824',
-            'scanning_length': '113825',
-            'single_collimation': '113826',
-            'total_collimation': '113827',
-            'num_xray_sources': '113823',
-            'pitch_factor': '113828',
-
-            # Parâmetros da fonte de raios-X
-            'xray_source_params': '113831',
-            'xray_source_id': '113832',
-            'kvp': '113733',
-            'max_tube_current': '113833',
-            'tube_current': '113734',
-            'exposure_time_per_rotation': '113834',
-
-            # Dados de dose
-            'ct_dose': '113829',
-            'mean_ctdivol': '113830',
-            'phantom_type': '113835',
-            'dlp': '113838',
-            'ssde': '113930',
-            'ctdivol_alert_value': '113904'
-        }
+    # Códigos DICOM para identificação dos campos (somente leitura, compartilhados entre instâncias)
+    CONCEPT_CODES = MappingProxyType({
+        # Contexto do dispositivo
+        'device_observer_name': '121013',
+        'device_observer_manufacturer': '121014',
+        'device_observer_model': '121015',
+        'device_observer_serial': '121016',
+        'device_observer_location': '121017',
+
+        # Dados de irradiação
+        'start_irradiation': '113809',
+        'end_irradiation': '113810',
+        'total_events': '113812',
+        'total_dlp': '113813',
+
+        # Aquisição CT
+        'ct_acquisition': '113819',
+        'acquisition_protocol': '125203',
+        'target_region': '123014',
+        'acquisition_type': '113820',
+        'procedure_context': 'G-C32C',
+        'irradiation_event_uid': '113769',
+        'comment': '121106',
+
+        # Parâmetros de aquisição
+        'acquisition_params': '113822',
+        'exposure_time': '113824',
+        'scanning_length': '113825',
+        'single_collimation': '113826',
+        'total_collimation': '113827',
+        'num_xray_sources': '113823',
+        'pitch_factor': '113828',
+
+        # Parâmetros da fonte de raios-X
+        'xray_source_params': '113831',
+        'xray_source_id': '113832',
+        'kvp': '113733',
+        'max_tube_current': '113833',
+        'tube_current': '113734',
+        'exposure_time_per_rotation': '113834',
+
+        # Dados de dose
+        'ct_dose': '113829',
+        'mean_ctdivol': '113830',
+        'phantom_type': '113835',
+        'dlp': '113838',
+        'ssde': '113930',
+        'ctdivol_alert_value': '113904'
+    })
 
     def find_dicom_files_recursive(self, root_path: str, debug_mode: bool = False) -> List[str]:
         """
-        Busca recursivamente por arquivos DICOM em todas as subpastas
+        Busca recursivamente por arquivos DICOM em todas as subpastas.
+        Cada subpasta de primeiro nível (ex.: um paciente) é varrida em uma thread,
+        sobrepondo a latência de listagem/leitura dos cabeçalhos; a ordem do resultado é preservada.
         """
         dicom_files = []
 
@@ -177,18 +340,17 @@ class DICOMDoseExtractor:
             print(f"\n🔍 Iniciando busca recursiva em: {root_path}")
 
         try:
-            for root, dirs, files in os.walk(root_path):
-                # Ignora a pasta atual se for onde está o script
-                if root == root_path:
-                    continue
-
-                for file in files:
-                    file_path = os.path.join(root, file)
-
-                    # Verifica se é um arquivo DICOM válido
-                    if self.is_dicom_file(file_path, debug_mode):
-                        dicom_files.append(file_path)
-                        if debug_mode:
+            # Ignora os arquivos da pasta atual (onde está o script): só as subpastas são varridas
+            with os.scandir(root_path) as it:
+                top_folders = [entry.path for entry in it if entry.is_dir() and not entry.is_symlink()]
+
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for folder_files in executor.map(lambda folder: self.scan_folder_tree(folder, debug_mode),
+                                                 top_folders):
+                    dicom_files.extend(folder_files)
+                    if debug_mode:
+                        for file_path in folder_files:
                             print(f"  ✓ DICOM encontrado: {file_path}")
 
         except Exception as e:
@@ -200,13 +362,54 @@ class DICOMDoseExtractor:
 
         return dicom_files
 
-    def is_dicom_file(self, file_path: str, debug_mode: bool = False) -> bool:
+    def scan_folder_tree(self, folder_path: str, debug_mode: bool = False) -> List[str]:
         """
-        Verifica se um arquivo é um DICOM válido sem fazer leitura completa
+        Varre uma pasta e suas subpastas com os.scandir (o tipo e, no Windows, o tamanho de
+        cada entrada vêm da própria listagem), na ordem de visita do os.walk
+        """
+        dicom_files = []
+
+        pending = [folder_path]
+        while pending:
+            folder = pending.pop()
+            try:
+                with os.scandir(folder) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+
+            subfolders = []
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subfolders.append(entry.path)
+                    continue
+
+                # Descarta pelo nome, sem abrir, arquivos que claramente não são DICOM
+                if NON_DICOM_NAME_PATTERN.search(entry.name):
+                    continue
+
+                # Verifica se é um arquivo DICOM válido
+                if self.is_dicom_file(entry, debug_mode):
+                    dicom_files.append(entry.path)
+
+            # Pré-ordem, na ordem da listagem
+            pending.extend(reversed(subfolders))
+
+        return dicom_files
+
+    def is_dicom_file(self, file_path, debug_mode: bool = False) -> bool:
+        """
+        Verifica se um arquivo é um DICOM válido sem fazer leitura completa.
+        Aceita um caminho ou uma entrada de os.scandir (reaproveita o stat em cache).
         """
         try:
             # Verifica se o arquivo existe e não é muito pequeno
-            if not os.path.isfile(file_path) or os.path.getsize(file_path) < 132:
+            if isinstance(file_path, os.DirEntry):
+                if not file_path.is_file() or file_path.stat().st_size < 132:
+                    return False
+                file_path = file_path.path
+            elif not os.path.isfile(file_path) or os.path.getsize(file_path) < 132:
                 return False
 
             # Tenta ler apenas o header do DICOM
@@ -218,120 +421,175 @@ class DICOMDoseExtractor:
                 if dicm_prefix != b'DICM':
                     return False
 
-            # Se passou na verificação básica, tenta ler com pydicom
-            ds = pydicom.dcmread(file_path, stop_before_pixels=True, force=True)
+                # Se passou na verificação básica, lê com pydicom só até a Modality (grupo 0008);
+                # a presença da ContentSequence é verificada na extração
+                f.seek(0)
+                ds = read_partial(f, stop_when=_past_modality, force=True)
 
             # Verifica se é um Structured Report
-            return (hasattr(ds, 'Modality') and ds.Modality == 'SR' and
-                    hasattr(ds, 'ContentSequence'))
+            return getattr(ds, 'Modality', None) == 'SR'
 
         except Exception as e:
             if debug_mode and "not a valid DICOM file" not in str(e):
                 print(f"    ⚠️ Erro ao verificar {file_path}: {str(e)}")
             return False
 
-    def format_datetime(self, dt_str: str) -> str:
-        """Converte DICOM datetime para formato legível"""
-        if not dt_str:
-            return ""
+    def format_date_time(self, date_str: str, time_str: str) -> str:
+        """Converte DICOM date + time para formato legível (horário apenas se disponível)"""
+        formatted_date = format_date(date_str)
+        if time_str and len(time_str) >= 6:
+            return f"{formatted_date}, {time_str[:2]}:{time_str[2:4]}:{time_str[4:6]}"
+        return formatted_date
 
-        try:
-            # DICOM datetime format: YYYYMMDDHHMMSS.FFFFFF
-            if '.' in dt_str:
-                dt_part = dt_str.split('.')[0]
-            else:
-                dt_part = dt_str
-
-            if len(dt_part) >= 8:
-                year = dt_part[:4]
-                month = dt_part[4:6]
-                day = dt_part[6:8]
-
-                if len(dt_part) >= 14:
-                    hour = dt_part[8:10]
-                    minute = dt_part[10:12]
-                    second = dt_part[12:14]
-                    return f"{year}-{month}-{day} {hour}:{minute}:{second}"
-                else:
-                    return f"{year}-{month}-{day}"
-        except:
-            pass
-
-        return dt_str
-
-    def format_date(self, date_str: str) -> str:
-        """Converte DICOM date para formato legível"""
-        if not date_str or len(date_str) < 8:
-            return ""
-
-        try:
-            year = date_str[:4]
-            month = date_str[4:6]
-            day = date_str[6:8]
-
-            # Converte para formato mais legível
-            months = ['', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            month_name = months[int(month)]
-            return f"{month_name} {int(day)}, {year}"
-        except:
-            return date_str
-
-    def get_numeric_value_with_unit(self, content_item) -> str:
+    @staticmethod
+    def get_numeric_value_with_unit(content_item) -> str:
         """Extrai valor numérico com unidade de uma sequência MeasuredValue"""
-        try:
-            if hasattr(content_item, 'MeasuredValueSequence') and content_item.MeasuredValueSequence:
-                measured_value = content_item.MeasuredValueSequence[0]
-
-                # Valor numérico
-                numeric_value = getattr(measured_value, 'NumericValue', '')
+        measured_values = getattr(content_item, 'MeasuredValueSequence', None)
+        if not measured_values:
+            return ""
+        measured_value = measured_values[0]
 
-                # Unidade
-                unit = ''
-                if hasattr(measured_value,
-                           'MeasurementUnitsCodeSequence') and measured_value.MeasurementUnitsCodeSequence:
-                    unit_seq = measured_value.MeasurementUnitsCodeSequence[0]
-                    unit = getattr(unit_seq, 'CodeMeaning', '')
+        # Valor numérico
+        numeric_value = getattr(measured_value, 'NumericValue', '')
+        if not numeric_value:
+            return ""
 
-                if numeric_value and unit:
-                    return f"{numeric_value} {unit}"
-                elif numeric_value:
-                    return str(numeric_value)
+        # Unidade
+        unit = ''
+        unit_codes = getattr(measured_value, 'MeasurementUnitsCodeSequence', None)
+        if unit_codes:
+            unit = getattr(unit_codes[0], 'CodeMeaning', '')
 
-        except Exception as e:
-            pass
+        if unit:
+            return f"{numeric_value} {unit}"
+        return str(numeric_value)
 
-        return ""
+    @staticmethod
+    def get_float_value(content_item) -> Optional[float]:
+        """
+        Extrai o valor numérico de uma sequência MeasuredValue como float
+        (None se ausente ou não finito, como 'NaN' ou 'inf', que o DS aceita)
+        """
+        measured_values = getattr(content_item, 'MeasuredValueSequence', None)
+        if not measured_values:
+            return None
+        numeric_value = getattr(measured_values[0], 'NumericValue', None)
+        try:
+            value = float(numeric_value)
+        except (TypeError, ValueError):
+            return None
+        return value if math.isfinite(value) else None
 
-    def get_text_value(self, content_item) -> str:
+    @staticmethod
+    def get_text_value(content_item) -> str:
         """Extrai valor de texto"""
         return getattr(content_item, 'TextValue', '')
 
-    def get_code_meaning(self, content_item) -> str:
+    @staticmethod
+    def get_code_meaning(content_item) -> str:
         """Extrai Code Meaning de uma sequência de conceito"""
-        try:
-            if hasattr(content_item, 'ConceptCodeSequence') and content_item.ConceptCodeSequence:
-                return getattr(content_item.ConceptCodeSequence[0], 'CodeMeaning', '')
-        except:
-            pass
+        concept_codes = getattr(content_item, 'ConceptCodeSequence', None)
+        if concept_codes:
+            return getattr(concept_codes[0], 'CodeMeaning', '')
         return ""
 
-    def get_datetime_value(self, content_item) -> str:
+    @staticmethod
+    def get_datetime_value(content_item) -> str:
         """Extrai valor datetime"""
         dt_value = getattr(content_item, 'DateTime', '')
-        return self.format_datetime(dt_value)
-
-    def find_content_by_code(self, content_sequence, code_value: str):
-        """Encontra item na ContentSequence pelo código do conceito"""
+        return format_datetime(dt_value)
+
+    @staticmethod
+    def get_uid_value(content_item) -> str:
+        """Extrai valor UID"""
+        return str(getattr(content_item, 'UID', ''))
+
+    # Tabelas de despacho: código do conceito -> (campo do dataclass, extrator do valor).
+    # Guardam as funções dos staticmethods (objetos staticmethod só são chamáveis a partir do Python 3.10)
+    _numeric = get_numeric_value_with_unit.__func__
+    _text = get_text_value.__func__
+    _code_meaning = get_code_meaning.__func__
+    _datetime = get_datetime_value.__func__
+    _uid = get_uid_value.__func__
+
+    DEVICE_FIELDS = {
+        CONCEPT_CODES['device_observer_name']: ('observer_name', _text),
+        CONCEPT_CODES['device_observer_manufacturer']: ('manufacturer', _text),
+        CONCEPT_CODES['device_observer_model']: ('model_name', _text),
+        CONCEPT_CODES['device_observer_serial']: ('serial_number', _text),
+        CONCEPT_CODES['device_observer_location']: ('physical_location', _text),
+    }
+    IRRADIATION_FIELDS = {
+        CONCEPT_CODES['start_irradiation']: ('start_time', _datetime),
+        CONCEPT_CODES['end_irradiation']: ('end_time', _datetime),
+    }
+    ACCUMULATED_FIELDS = {
+        CONCEPT_CODES['total_events']: ('total_events', _numeric),
+        CONCEPT_CODES['total_dlp']: ('total_dlp', _numeric),
+    }
+    ACQUISITION_FIELDS = {
+        CONCEPT_CODES['acquisition_protocol']: ('protocol', _text),
+        CONCEPT_CODES['target_region']: ('target_region', _code_meaning),
+        CONCEPT_CODES['acquisition_type']: ('acquisition_type', _code_meaning),
+        CONCEPT_CODES['procedure_context']: ('procedure_context', _code_meaning),
+        CONCEPT_CODES['irradiation_event_uid']: ('irradiation_event_uid', _uid),
+        CONCEPT_CODES['comment']: ('comment', _text),
+    }
+    ACQUISITION_PARAMS_FIELDS = {
+        CONCEPT_CODES['exposure_time']: ('exposure_time', _numeric),
+        CONCEPT_CODES['scanning_length']: ('scanning_length', _numeric),
+        CONCEPT_CODES['single_collimation']: ('nominal_single_collimation', _numeric),
+        CONCEPT_CODES['total_collimation']: ('nominal_total_collimation', _numeric),
+        CONCEPT_CODES['num_xray_sources']: ('num_xray_sources', _numeric),
+        CONCEPT_CODES['pitch_factor']: ('pitch_factor', _numeric),
+    }
+    XRAY_SOURCE_FIELDS = {
+        CONCEPT_CODES['xray_source_id']: ('identification', _text),
+        CONCEPT_CODES['kvp']: ('kvp', _numeric),
+        CONCEPT_CODES['max_tube_current']: ('max_tube_current', _numeric),
+        CONCEPT_CODES['tube_current']: ('tube_current', _numeric),
+        CONCEPT_CODES['exposure_time_per_rotation']: ('exposure_time_per_rotation', _numeric),
+    }
+    CT_DOSE_FIELDS = {
+        CONCEPT_CODES['mean_ctdivol']: ('mean_ctdivol', _numeric),
+        CONCEPT_CODES['phantom_type']: ('phantom_type', _code_meaning),
+        CONCEPT_CODES['dlp']: ('dlp', _numeric),
+        CONCEPT_CODES['ssde']: ('size_specific_dose', _numeric),
+        CONCEPT_CODES['ctdivol_alert_value']: ('ctdivol_alert_value', _numeric),
+    }
+    del _numeric, _text, _code_meaning, _datetime, _uid
+
+    @staticmethod
+    def index_by_code(content_sequence, repeated: Dict[str, list] = None) -> Dict[str, Any]:
+        """
+        Indexa os itens de uma ContentSequence pelo código do conceito.
+        Em caso de códigos repetidos, mantém o primeiro item (como a busca linear fazia);
+        os códigos presentes em `repeated` (código -> lista) têm todos os itens acumulados na lista.
+        """
+        index = {}
         for item in content_sequence:
-            try:
-                if hasattr(item, 'ConceptNameCodeSequence') and item.ConceptNameCodeSequence:
-                    concept_code = getattr(item.ConceptNameCodeSequence[0], 'CodeValue', '')
-                    if concept_code == code_value:
-                        return item
-            except:
-                continue
-        return None
+            concept_names = getattr(item, 'ConceptNameCodeSequence', None)
+            if concept_names:
+                code = getattr(concept_names[0], 'CodeValue', '')
+                index.setdefault(code, item)
+                if repeated and code in repeated:
+                    repeated[code].append(item)
+        return index
+
+    def container_index(self, content_index: Dict[str, Any], code: str) -> Optional[Dict[str, Any]]:
+        """Retorna o índice da ContentSequence do container `code`, ou None se ausente"""
+        content = getattr(content_index.get(code), 'ContentSequence', None)
+        if content is None:
+            return None
+        return self.index_by_code(content)
+
+    def fill_fields(self, target, content_index: Dict[str, Any], fields: Dict[str, tuple]):
+        """Preenche os campos de `target` a partir do índice, conforme a tabela de despacho"""
+        for code, (field_name, getter) in fields.items():
+            item = content_index.get(code)
+            if item:
+                setattr(target, field_name, getter(item))
+        return target
 
     def extract_patient_info(self, ds) -> EssentialInfo:
         """Extrai informações básicas do paciente"""
@@ -356,283 +614,99 @@ class DICOMDoseExtractor:
         study_date = str(getattr(ds, 'StudyDate', ''))
         study_time = str(getattr(ds, 'StudyTime', ''))
         if study_date:
-            formatted_date = self.format_date(study_date)
-            if study_time and len(study_time) >= 6:
-                # Adiciona horário se disponível
-                hour = study_time[:2]
-                minute = study_time[2:4]
-                second = study_time[4:6]
-                essential.study_date = f"{formatted_date}, {hour}:{minute}:{second}"
-            else:
-                essential.study_date = formatted_date
+            essential.study_date = self.format_date_time(study_date, study_time)
 
         # Birth Date
         birth_date = str(getattr(ds, 'PatientBirthDate', ''))
         if birth_date:
-            essential.birth_date = self.format_date(birth_date)
+            essential.birth_date = format_date(birth_date)
 
         # Sex
         essential.sex = str(getattr(ds, 'PatientSex', ''))
 
         return essential
 
-    def extract_device_info(self, content_sequence) -> DeviceInfo:
+    def extract_device_info(self, content_index) -> DeviceInfo:
         """Extrai informações do dispositivo"""
-        device = DeviceInfo()
-
-        # Device Observer Name
-        item = self.find_content_by_code(content_sequence, self.concept_codes['device_observer_name'])
-        if item:
-            device.observer_name = self.get_text_value(item)
-
-        # Manufacturer
-        item = self.find_content_by_code(content_sequence, self.concept_codes['device_observer_manufacturer'])
-        if item:
-            device.manufacturer = self.get_text_value(item)
-
-        # Model Name
-        item = self.find_content_by_code(content_sequence, self.concept_codes['device_observer_model'])
-        if item:
-            device.model_name = self.get_text_value(item)
-
-        # Serial Number
-        item = self.find_content_by_code(content_sequence, self.concept_codes['device_observer_serial'])
-        if item:
-            device.serial_number = self.get_text_value(item)
-
-        # Physical Location
-        item = self.find_content_by_code(content_sequence, self.concept_codes['device_observer_location'])
-        if item:
-            device.physical_location = self.get_text_value(item)
-
-        return device
+        return self.fill_fields(DeviceInfo(), content_index, self.DEVICE_FIELDS)
 
-    def extract_irradiation_info(self, content_sequence) -> IrradiationInfo:
+    def extract_irradiation_info(self, content_index) -> IrradiationInfo:
         """Extrai informações de irradiação acumulada"""
-        irradiation = IrradiationInfo()
+        irradiation = self.fill_fields(IrradiationInfo(), content_index, self.IRRADIATION_FIELDS)
 
-        # Start time
-        item = self.find_content_by_code(content_sequence, self.concept_codes['start_irradiation'])
-        if item:
-            irradiation.start_time = self.get_datetime_value(item)
+        # Container de dados acumulados (CT Accumulated Dose Data)
+        accumulated_index = self.container_index(content_index, '113811')
+        if accumulated_index is not None:
+            self.fill_fields(irradiation, accumulated_index, self.ACCUMULATED_FIELDS)
 
-        # End time
-        item = self.find_content_by_code(content_sequence, self.concept_codes['end_irradiation'])
-        if item:
-            irradiation.end_time = self.get_datetime_value(item)
-
-        # Procura por container de dados acumulados
-        for item in content_sequence:
-            try:
-                if (hasattr(item, 'ConceptNameCodeSequence') and
-                        item.ConceptNameCodeSequence and
-                        getattr(item.ConceptNameCodeSequence[0], 'CodeValue',
-                                '') == '113811'):  # CT Accumulated Dose Data
-
-                    if hasattr(item, 'ContentSequence'):
-                        # Total events
-                        events_item = self.find_content_by_code(item.ContentSequence,
-                                                                self.concept_codes['total_events'])
-                        if events_item:
-                            irradiation.total_events = self.get_numeric_value_with_unit(events_item)
-
-                        # Total DLP
-                        dlp_item = self.find_content_by_code(item.ContentSequence, self.concept_codes['total_dlp'])
-                        if dlp_item:
-                            irradiation.total_dlp = self.get_numeric_value_with_unit(dlp_item)
-                    break
-            except:
-                continue
+            # DLP total também como número, para as estatísticas dispensarem o parse do texto
+            dlp_item = accumulated_index.get(self.CONCEPT_CODES['total_dlp'])
+            if dlp_item:
+                irradiation.total_dlp_value = self.get_float_value(dlp_item)
 
         return irradiation
 
-    def extract_acquisition_params(self, content_sequence) -> CTAcquisitionParams:
+    def extract_acquisition_params(self, content_index) -> CTAcquisitionParams:
         """Extrai parâmetros de aquisição CT"""
-        params = CTAcquisitionParams()
-
-        # Exposure Time
-        item = self.find_content_by_code(content_sequence, self.concept_codes['exposure_time'])
-        if item:
-            params.exposure_time = self.get_numeric_value_with_unit(item)
-
-        # Scanning Length
-        item = self.find_content_by_code(content_sequence, self.concept_codes['scanning_length'])
-        if item:
-            params.scanning_length = self.get_numeric_value_with_unit(item)
+        return self.fill_fields(CTAcquisitionParams(), content_index, self.ACQUISITION_PARAMS_FIELDS)
 
-        # Single Collimation
-        item = self.find_content_by_code(content_sequence, self.concept_codes['single_collimation'])
-        if item:
-            params.nominal_single_collimation = self.get_numeric_value_with_unit(item)
-
-        # Total Collimation
-        item = self.find_content_by_code(content_sequence, self.concept_codes['total_collimation'])
-        if item:
-            params.nominal_total_collimation = self.get_numeric_value_with_unit(item)
-
-        # Number of X-Ray Sources
-        item = self.find_content_by_code(content_sequence, self.concept_codes['num_xray_sources'])
-        if item:
-            params.num_xray_sources = self.get_numeric_value_with_unit(item)
-
-        # Pitch Factor
-        item = self.find_content_by_code(content_sequence, self.concept_codes['pitch_factor'])
-        if item:
-            params.pitch_factor = self.get_numeric_value_with_unit(item)
-
-        return params
-
-    def extract_xray_source_params(self, content_sequence) -> XRaySourceParams:
+    def extract_xray_source_params(self, content_index) -> XRaySourceParams:
         """Extrai parâmetros da fonte de raios-X"""
-        xray_params = XRaySourceParams()
-
-        # Source ID
-        item = self.find_content_by_code(content_sequence, self.concept_codes['xray_source_id'])
-        if item:
-            xray_params.identification = self.get_text_value(item)
+        return self.fill_fields(XRaySourceParams(), content_index, self.XRAY_SOURCE_FIELDS)
 
-        # KVP
-        item = self.find_content_by_code(content_sequence, self.concept_codes['kvp'])
-        if item:
-            xray_params.kvp = self.get_numeric_value_with_unit(item)
-
-        # Max Tube Current
-        item = self.find_content_by_code(content_sequence, self.concept_codes['max_tube_current'])
-        if item:
-            xray_params.max_tube_current = self.get_numeric_value_with_unit(item)
-
-        # Tube Current
-        item = self.find_content_by_code(content_sequence, self.concept_codes['tube_current'])
-        if item:
-            xray_params.tube_current = self.get_numeric_value_with_unit(item)
-
-        # Exposure Time per Rotation
-        item = self.find_content_by_code(content_sequence, self.concept_codes['exposure_time_per_rotation'])
-        if item:
-            xray_params.exposure_time_per_rotation = self.get_numeric_value_with_unit(item)
-
-        return xray_params
-
-    def extract_ct_dose(self, content_sequence) -> CTDose:
+    def extract_ct_dose(self, content_index) -> CTDose:
         """Extrai dados de dose CT"""
-        dose = CTDose()
+        return self.fill_fields(CTDose(), content_index, self.CT_DOSE_FIELDS)
+
+    def extract_ct_acquisitions(self, acquisition_items) -> List[CTAcquisition]:
+        """Extrai todas as aquisições CT (containers já separados na indexação da sequência principal)"""
+        acquisitions = []
 
-        # Mean CTDIvol
-        item = self.find_content_by_code(content_sequence, self.concept_codes['mean_ctdivol'])
-        if item:
-            dose.mean_ctdivol = self.get_numeric_value_with_unit(item)
+        # Códigos dos sub-containers resolvidos uma vez, fora do loop
+        params_code = self.CONCEPT_CODES['acquisition_params']
+        xray_code = self.CONCEPT_CODES['xray_source_params']
+        dose_code = self.CONCEPT_CODES['ct_dose']
 
-        # Phantom Type
-        item = self.find_content_by_code(content_sequence, self.concept_codes['phantom_type'])
-        if item:
-            dose.phantom_type = self.get_code_meaning(item)
+        for item in acquisition_items:
+            acquisition = CTAcquisition()
 
-        # DLP
-        item = self.find_content_by_code(content_sequence, self.concept_codes['dlp'])
-        if item:
-            dose.dlp = self.get_numeric_value_with_unit(item)
+            acq_content = getattr(item, 'ContentSequence', None)
+            if acq_content is not None:
+                acq_index = self.index_by_code(acq_content)
 
-        # Size Specific Dose Estimation (SSDE)
-        item = self.find_content_by_code(content_sequence, self.concept_codes['ssde'])
-        if item:
-            dose.size_specific_dose = self.get_numeric_value_with_unit(item)
+                self.fill_fields(acquisition, acq_index, self.ACQUISITION_FIELDS)
 
-        # CTDIvol Alert Value
-        item = self.find_content_by_code(content_sequence, self.concept_codes['ctdivol_alert_value'])
-        if item:
-            dose.ctdivol_alert_value = self.get_numeric_value_with_unit(item)
+                # Acquisition Parameters
+                params_index = self.container_index(acq_index, params_code)
+                if params_index is not None:
+                    acquisition.acquisition_params = self.extract_acquisition_params(params_index)
 
-        return dose
+                    # Dentro dos params, procura por X-Ray Source Parameters
+                    xray_index = self.container_index(params_index, xray_code)
+                    if xray_index is not None:
+                        acquisition.xray_source_params = self.extract_xray_source_params(xray_index)
 
-    def extract_ct_acquisitions(self, content_sequence) -> List[CTAcquisition]:
-        """Extrai todas as aquisições CT"""
-        acquisitions = []
+                # CT Dose
+                dose_index = self.container_index(acq_index, dose_code)
+                if dose_index is not None:
+                    acquisition.ct_dose = self.extract_ct_dose(dose_index)
 
-        # Procura por containers de aquisição CT
-        for item in content_sequence:
-            try:
-                if (hasattr(item, 'ConceptNameCodeSequence') and
-                        item.ConceptNameCodeSequence and
-                        getattr(item.ConceptNameCodeSequence[0], 'CodeValue', '') == self.concept_codes[
-                            'ct_acquisition']):
-
-                    acquisition = CTAcquisition()
-
-                    if hasattr(item, 'ContentSequence'):
-                        acq_content = item.ContentSequence
-
-                        # Acquisition Protocol
-                        protocol_item = self.find_content_by_code(acq_content,
-                                                                  self.concept_codes['acquisition_protocol'])
-                        if protocol_item:
-                            acquisition.protocol = self.get_text_value(protocol_item)
-
-                        # Target Region
-                        target_item = self.find_content_by_code(acq_content, self.concept_codes['target_region'])
-                        if target_item:
-                            acquisition.target_region = self.get_code_meaning(target_item)
-
-                        # Acquisition Type
-                        type_item = self.find_content_by_code(acq_content, self.concept_codes['acquisition_type'])
-                        if type_item:
-                            acquisition.acquisition_type = self.get_code_meaning(type_item)
-
-                        # Procedure Context
-                        context_item = self.find_content_by_code(acq_content, self.concept_codes['procedure_context'])
-                        if context_item:
-                            acquisition.procedure_context = self.get_code_meaning(context_item)
-
-                        # Irradiation Event UID
-                        uid_item = self.find_content_by_code(acq_content, self.concept_codes['irradiation_event_uid'])
-                        if uid_item:
-                            acquisition.irradiation_event_uid = str(getattr(uid_item, 'UID', ''))
-
-                        # Comment
-                        comment_item = self.find_content_by_code(acq_content, self.concept_codes['comment'])
-                        if comment_item:
-                            acquisition.comment = self.get_text_value(comment_item)
-
-                        # Procura por sub-containers
-                        for sub_item in acq_content:
-                            try:
-                                if (hasattr(sub_item, 'ConceptNameCodeSequence') and
-                                        sub_item.ConceptNameCodeSequence):
-
-                                    code = getattr(sub_item.ConceptNameCodeSequence[0], 'CodeValue', '')
-
-                                    # Acquisition Parameters
-                                    if code == self.concept_codes['acquisition_params'] and hasattr(sub_item,
-                                                                                                    'ContentSequence'):
-                                        acquisition.acquisition_params = self.extract_acquisition_params(
-                                            sub_item.ContentSequence)
-
-                                        # Dentro dos params, procura por X-Ray Source Parameters
-                                        for param_item in sub_item.ContentSequence:
-                                            if (hasattr(param_item, 'ConceptNameCodeSequence') and
-                                                    param_item.ConceptNameCodeSequence and
-                                                    getattr(param_item.ConceptNameCodeSequence[0], 'CodeValue', '') ==
-                                                    self.concept_codes['xray_source_params'] and
-                                                    hasattr(param_item, 'ContentSequence')):
-                                                acquisition.xray_source_params = self.extract_xray_source_params(
-                                                    param_item.ContentSequence)
-                                                break
-
-                                    # CT Dose
-                                    elif code == self.concept_codes['ct_dose'] and hasattr(sub_item, 'ContentSequence'):
-                                        acquisition.ct_dose = self.extract_ct_dose(sub_item.ContentSequence)
-
-                            except:
-                                continue
-
-                    acquisitions.append(acquisition)
-
-            except:
-                continue
+            acquisitions.append(acquisition)
 
         return acquisitions
 
-    def extract_from_dicom(self, dicom_path: str, debug_mode: bool = False) -> CTScanReport:
-        """Extrai informações de um arquivo DICOM SR"""
+    def extract_from_dicom(self, dicom_path: str, debug_mode: bool = False) -> Optional[CTScanReport]:
+        """Extrai informações de um arquivo DICOM SR (None se não for um relatório de dose ou em caso de erro)"""
+        try:
+            return self.extract_report(dicom_path, debug_mode)
+        except NotDoseReportError:
+            return None
+
+    def extract_report(self, dicom_path: str, debug_mode: bool = False) -> Optional[CTScanReport]:
+        """
+        Extrai informações de um arquivo DICOM SR.
+        Levanta NotDoseReportError se o arquivo não é um relatório de dose; retorna None em caso de erro.
+        """
 
         if debug_mode:
             print(f"\n{'=' * 80}")
@@ -640,8 +714,8 @@ class DICOMDoseExtractor:
             print(f"{'=' * 80}")
 
         try:
-            # Lê o arquivo DICOM
-            ds = pydicom.dcmread(dicom_path)
+            # Lê o arquivo DICOM (apenas os tags usados na extração)
+            ds = pydicom.dcmread(dicom_path, specific_tags=REPORT_TAGS, stop_before_pixels=True)
 
             if debug_mode:
                 print(f"SOP Class: {getattr(ds, 'SOPClassUID', 'Unknown')}")
@@ -652,7 +726,7 @@ class DICOMDoseExtractor:
                     not hasattr(ds, 'ContentSequence')):
                 if debug_mode:
                     print("❌ Arquivo não é um DICOM SR válido")
-                return None
+                raise NotDoseReportError(dicom_path)
 
             report = CTScanReport()
 
@@ -667,26 +741,22 @@ class DICOMDoseExtractor:
             content_date = str(getattr(ds, 'ContentDate', ''))
             content_time = str(getattr(ds, 'ContentTime', ''))
             if content_date:
-                formatted_date = self.format_date(content_date)
-                if content_time and len(content_time) >= 6:
-                    hour = content_time[:2]
-                    minute = content_time[2:4]
-                    second = content_time[4:6]
-                    report.report_date = f"{formatted_date}, {hour}:{minute}:{second}"
-                else:
-                    report.report_date = formatted_date
+                report.report_date = self.format_date_time(content_date, content_time)
 
             # Extrai dados do Content Sequence principal
             main_content = ds.ContentSequence
+            acquisition_items = []
+            main_index = self.index_by_code(main_content,
+                                            {self.CONCEPT_CODES['ct_acquisition']: acquisition_items})
 
             # Device info
-            report.device = self.extract_device_info(main_content)
+            report.device = self.extract_device_info(main_index)
 
             # Irradiation info
-            report.irradiation = self.extract_irradiation_info(main_content)
+            report.irradiation = self.extract_irradiation_info(main_index)
 
             # CT Acquisitions
-            report.acquisitions = self.extract_ct_acquisitions(main_content)
+            report.acquisitions = self.extract_ct_acquisitions(acquisition_items)
 
             if debug_mode:
                 print(f"✓ Dados extraídos:")
@@ -701,15 +771,39 @@ class DICOMDoseExtractor:
 
             return report
 
+        except NotDoseReportError:
+            raise
         except Exception as e:
             if debug_mode:
                 print(f"❌ Erro ao processar DICOM: {str(e)}")
             return None
 
 
-def process_all_dicoms_recursive(root_path: str = ".", output_file: str = None, debug_mode: bool = False) -> List[Dict]:
+def _process_one(dicom_path: str, debug_mode: bool = False):
+    """
+    Processa um único arquivo DICOM (executado em um processo do pool).
+    Retorna (relatório como dict ou None, mensagem de erro ou None, saída de debug capturada,
+    True se o arquivo não é um relatório de dose e deve ser ignorado).
+    """
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            report = DICOMDoseExtractor().extract_report(dicom_path, debug_mode=debug_mode)
+        return (report.to_dict() if report else None), None, output.getvalue(), False
+    except NotDoseReportError:
+        return None, None, output.getvalue(), True
+    except Exception as e:
+        return None, str(e), output.getvalue(), False
+
+
+def process_all_dicoms_recursive(root_path: str = ".", output_file: str = None, debug_mode: bool = False,
+                                 ndjson: bool = False, checkpoint_file: str = None) -> int:
     """
-    Processa todos os arquivos DICOM encontrados recursivamente em uma estrutura de pastas
+    Processa todos os arquivos DICOM encontrados recursivamente em uma estrutura de pastas.
+    Cada relatório é gravado no arquivo de saída assim que extraído (a lista completa não
+    fica em memória); retorna o número de relatórios processados.
+    Com checkpoint_file, os relatórios são guardados em SQLite e os arquivos já concluídos
+    em uma execução anterior não são reprocessados.
     """
 
     extractor = DICOMDoseExtractor()
@@ -721,110 +815,317 @@ def process_all_dicoms_recursive(root_path: str = ".", output_file: str = None,
 
     if not dicom_files:
         print("❌ Nenhum arquivo DICOM SR encontrado na estrutura de pastas.")
-        return []
+        return 0
 
     print(f"📊 Total de arquivos DICOM encontrados: {len(dicom_files)}")
     print(f"{'=' * 80}")
 
-    reports = []
+    if output_file is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = f"dicom_reports_consolidated_{timestamp}.{'ndjson' if ndjson else 'json'}"
+
     processed_count = 0
     error_count = 0
+    skipped_count = 0
+
+    # Estatísticas acumuladas durante o processamento
+    total_dlp_values = array('d')
+    hospitals = set()
+    patients = set()
+
+    # Arquivos já concluídos em uma execução anterior (retomada pelo checkpoint)
+    checkpoint = ReportCheckpoint(checkpoint_file) if checkpoint_file else None
+    pending_files = dicom_files
+    if checkpoint is not None:
+        done_files = checkpoint.done_files()
+        if done_files:
+            pending_files = [f for f in dicom_files if os.path.abspath(f) not in done_files]
+            print(f"⏭️ Arquivos já processados no checkpoint: {len(dicom_files) - len(pending_files)}")
+
+    writer = NDJSONWriter(output_file) if ndjson else ConsolidatedJSONWriter(output_file)
+
+    # Os caminhos da busca (entry.path) começam pela pasta raiz como informada, unida ao nome
+    # como no os.path.join (separador só se ainda não houver): o caminho relativo exibido é
+    # só uma fatia, sem o os.path.relpath a cada arquivo
+    prefix_len = len(os.path.join(root_path, ''))
+
+    def add_report(report_dict: Dict):
+        nonlocal processed_count
+        writer.write(report_dict)
+        processed_count += 1
+
+        dlp = report_dict['irradiation']['total_dlp_value']
+        if dlp is not None:
+            total_dlp_values.append(dlp)
+        if report_dict['hospital']:
+            hospitals.add(report_dict['hospital'])
+        if report_dict['essential']['patient_id']:
+            patients.add(report_dict['essential']['patient_id'])
 
-    for i, dicom_file in enumerate(dicom_files, 1):
-        try:
-            print(f"📄 Processando {i}/{len(dicom_files)}: {os.path.relpath(dicom_file, root_path)}")
+    try:
+        # Processa os arquivos em paralelo; os resultados chegam na ordem original
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(_process_one, pending_files, [debug_mode] * len(pending_files), chunksize=8)
+
+            for i, (dicom_file, (report_dict, error, log, skipped)) in enumerate(zip(pending_files, results), 1):
+                # SR sem ContentSequence: não é um relatório de dose, ignorado sem contar como erro
+                # (e marcado no checkpoint, para não ser tentado de novo)
+                if skipped:
+                    skipped_count += 1
+                    if checkpoint is not None:
+                        checkpoint.save(dicom_file, None)
+                    if debug_mode:
+                        sys.stdout.write(f"  ⏭️ Ignorado (não é um relatório de dose): {dicom_file[prefix_len:]}\n")
+                    continue
 
-            report = extractor.extract_from_dicom(dicom_file, debug_mode=debug_mode)
+                # Saída do arquivo montada em um único bloco (uma escrita no stdout por arquivo)
+                out = [f"📄 Processando {i}/{len(pending_files)}: {dicom_file[prefix_len:]}\n"]
+
+                # Saída de debug capturada no processo do pool
+                if log:
+                    out.append(log)
+
+                if error:
+                    error_count += 1
+                    out.append(f"  ❌ Erro: {error}\n")
+                elif report_dict:
+                    # Com checkpoint, a saída é montada do SQLite ao final (na ordem da busca)
+                    if checkpoint is not None:
+                        checkpoint.save(dicom_file, report_dict)
+                    else:
+                        add_report(report_dict)
+
+                    if not debug_mode:
+                        out.append(f"  ✓ Sucesso - Patient ID: {report_dict['essential']['patient_id']}, "
+                                   f"DLP: {report_dict['irradiation']['total_dlp']}\n")
+                else:
+                    error_count += 1
+                    out.append(f"  ❌ Falha ao extrair dados\n")
 
-            if report:
-                report_dict = asdict(report)
-                reports.append(report_dict)
-                processed_count += 1
+                sys.stdout.write(''.join(out))
 
-                if not debug_mode:
-                    print(f"  ✓ Sucesso - Patient ID: {report.essential.patient_id}, DLP: {report.irradiation.total_dlp}")
-            else:
-                error_count += 1
-                print(f"  ❌ Falha ao extrair dados")
+        if checkpoint is not None:
+            # Os ignorados são recontados do checkpoint (inclui os de uma execução anterior)
+            skipped_count = 0
+            for report_dict in checkpoint.reports(dicom_files):
+                if report_dict is None:
+                    skipped_count += 1
+                else:
+                    add_report(report_dict)
+    except BaseException:
+        writer.discard()
+        raise
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    # Relatório final (escrito de uma vez)
+    summary = [
+        f"\n{'=' * 80}",
+        f"📊 RESUMO DO PROCESSAMENTO",
+        f"{'=' * 80}",
+        f"Total de arquivos encontrados: {len(dicom_files) - skipped_count}",
+        f"Processados com sucesso: {processed_count}",
+        f"Erros: {error_count}",
+    ]
+
+    if not processed_count:
+        print('\n'.join(summary))
+        writer.discard()
+        return 0
+
+    summary.append(f"Pacientes únicos: {len(patients)}")
+
+    if hospitals:
+        summary.append(f"Hospitais: {', '.join(islice(hospitals, 3))}{'...' if len(hospitals) > 3 else ''}")
+
+    if total_dlp_values:
+        summary.append(f"DLP Total - Min: {min(total_dlp_values):.2f}, Max: {max(total_dlp_values):.2f}, Média: {sum(total_dlp_values) / len(total_dlp_values):.2f}")
+
+    print('\n'.join(summary))
+
+    # Finaliza o arquivo JSON consolidado (ou NDJSON, um relatório por linha)
+    try:
+        writer.close()
+        print(f"✅ Relatório consolidado salvo em: {output_file}")
+    except Exception as e:
+        print(f"❌ Erro ao salvar relatório consolidado: {str(e)}")
 
-        except Exception as e:
-            error_count += 1
-            print(f"  ❌ Erro: {str(e)}")
+    return processed_count
 
-    # Relatório final
-    print(f"\n{'=' * 80}")
-    print(f"📊 RESUMO DO PROCESSAMENTO")
-    print(f"{'=' * 80}")
-    print(f"Total de arquivos encontrados: {len(dicom_files)}")
-    print(f"Processados com sucesso: {processed_count}")
-    print(f"Erros: {error_count}")
 
-    if reports:
-        # Gera estatísticas básicas
-        total_dlp_values = []
-        hospitals = set()
-        patients = set()
+def ensure_output_folder(output_file: str):
+    """Cria (uma única vez, antes da escrita) a pasta do arquivo de saída, se necessário"""
+    folder = os.path.dirname(output_file)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
 
-        for report in reports:
-            # DLP values
-            if report.get('irradiation', {}).get('total_dlp'):
-                dlp_str = report['irradiation']['total_dlp']
-                try:
-                    dlp_value = float(dlp_str.split()[0])
-                    total_dlp_values.append(dlp_value)
-                except:
-                    pass
-
-            # Hospitals
-            hospital = report.get('hospital', '')
-            if hospital:
-                hospitals.add(hospital)
-
-            # Patients
-            patient_id = report.get('essential', {}).get('patient_id', '')
-            if patient_id:
-                patients.add(patient_id)
-
-        print(f"Pacientes únicos: {len(patients)}")
-
-        if hospitals:
-            print(f"Hospitais: {', '.join(list(hospitals)[:3])}{'...' if len(hospitals) > 3 else ''}")
-
-        if total_dlp_values:
-            print(f"DLP Total - Min: {min(total_dlp_values):.2f}, Max: {max(total_dlp_values):.2f}, Média: {sum(total_dlp_values) / len(total_dlp_values):.2f}")
-
-        # Salva o arquivo JSON consolidado
-        if output_file is None:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f"dicom_reports_consolidated_{timestamp}.json"
-
-        if save_consolidated_json(reports, output_file):
-            print(f"✅ Relatório consolidado salvo em: {output_file}")
+
+def _dumps_indented(obj) -> bytes:
+    """Serializa em JSON indentado com 2 espaços (orjson, se disponível)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+class NDJSONWriter:
+    """Grava relatórios em NDJSON (um relatório JSON por linha) com um único arquivo aberto"""
+
+    def __init__(self, output_file: str):
+        ensure_output_folder(output_file)
+        self.output_file = output_file
+        self.file = open(output_file, 'wb')
+
+    def write(self, report: Dict):
+        if orjson is not None:
+            self.file.write(orjson.dumps(report) + b'\n')
         else:
-            print(f"❌ Erro ao salvar relatório consolidado")
+            self.file.write(json.dumps(report, ensure_ascii=False).encode('utf-8') + b'\n')
 
-    return reports
+    def close(self):
+        self.file.close()
 
+    def discard(self):
+        self.file.close()
+        os.remove(self.output_file)
 
-def save_consolidated_json(reports: List[Dict], output_file: str) -> bool:
+
+class ReportCheckpoint:
     """
-    Salva todos os relatórios em um único arquivo JSON consolidado
+    Checkpoint em SQLite dos relatórios já extraídos (chave: caminho absoluto do arquivo),
+    para retomar uma execução interrompida sem reprocessar os arquivos concluídos.
+    Arquivos ignorados (não são relatórios de dose) ficam registrados com um relatório vazio.
     """
-    try:
-        # Adiciona metadados ao arquivo
-        consolidated_data = {
-            "metadata": {
+
+    # Relatórios acumulados antes de cada gravação em lote
+    BATCH_SIZE = 100
+
+    def __init__(self, checkpoint_file: str):
+        ensure_output_folder(checkpoint_file)
+        self.connection = sqlite3.connect(checkpoint_file, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS processed '
+                                '(file_path TEXT PRIMARY KEY, report BLOB NOT NULL)')
+        self.pending = []
+
+    def done_files(self) -> set:
+        return {row[0] for row in self.connection.execute('SELECT file_path FROM processed')}
+
+    def save(self, file_path: str, report: Optional[Dict]):
+        if report is None:
+            data = b''
+        elif orjson is not None:
+            data = orjson.dumps(report)
+        else:
+            data = json.dumps(report, ensure_ascii=False).encode('utf-8')
+
+        self.pending.append((os.path.abspath(file_path), data))
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        self.connection.execute('BEGIN')
+        self.connection.executemany('INSERT OR REPLACE INTO processed (file_path, report) VALUES (?, ?)',
+                                    self.pending)
+        self.connection.execute('COMMIT')
+        self.pending.clear()
+
+    def reports(self, file_paths: List[str]):
+        """Relatórios guardados para os arquivos informados, na mesma ordem (None para os ignorados)"""
+        self.flush()
+        loads = orjson.loads if orjson is not None else json.loads
+        for file_path in file_paths:
+            row = self.connection.execute('SELECT report FROM processed WHERE file_path = ?',
+                                          (os.path.abspath(file_path),)).fetchone()
+            if row:
+                yield loads(row[0]) if row[0] else None
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+# Tamanho dos blocos ao copiar os relatórios já serializados para o arquivo final
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class ConsolidatedJSONWriter:
+    """
+    Grava o JSON consolidado em streaming: cada relatório é serializado ao chegar em um
+    arquivo temporário ao lado da saída, e o close() monta o arquivo final com o metadata
+    (que depende do total de relatórios) antes da lista — no mesmo layout do json.dump(indent=2).
+    """
+
+    def __init__(self, output_file: str):
+        ensure_output_folder(output_file)
+        self.output_file = output_file
+        self.total_reports = 0
+        self.part = tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(output_file) or '.',
+                                                suffix='.part', delete=False)
+
+    def write(self, report: Dict):
+        if self.total_reports:
+            self.part.write(b',\n')
+        self.part.write(b'    ' + _dumps_indented(report).replace(b'\n', b'\n    '))
+        self.total_reports += 1
+
+    def close(self):
+        self.part.close()
+        try:
+            metadata = {
                 "generated_at": datetime.now().isoformat(),
-                "total_reports": len(reports),
+                "total_reports": self.total_reports,
                 "extractor_version": "recursive",
                 "description": "Consolidated CT dose reports extracted from DICOM SR files"
-            },
-            "reports": reports
-        }
+            }
+
+            with open(self.output_file, 'wb') as f:
+                f.write(b'{\n  "metadata": ' + _dumps_indented(metadata).replace(b'\n', b'\n  '))
+                if not self.total_reports:
+                    f.write(b',\n  "reports": []\n}')
+                    return
+
+                f.write(b',\n  "reports": [\n')
+                with open(self.part.name, 'rb') as part:
+                    shutil.copyfileobj(part, f, COPY_BUFFER_SIZE)
+                f.write(b'\n  ]\n}')
+        finally:
+            os.remove(self.part.name)
+
+    def discard(self):
+        self.part.close()
+        os.remove(self.part.name)
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(consolidated_data, f, indent=2, ensure_ascii=False)
 
+def save_ndjson(reports: List[Dict], output_file: str) -> bool:
+    """
+    Salva os relatórios em NDJSON (um relatório JSON por linha) com um único arquivo aberto
+    """
+    try:
+        writer = NDJSONWriter(output_file)
+        for report in reports:
+            writer.write(report)
+        writer.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Erro ao salvar NDJSON: {str(e)}")
+        return False
+
+
+def save_consolidated_json(reports: List[Dict], output_file: str) -> bool:
+    """
+    Salva todos os relatórios em um único arquivo JSON consolidado
+    """
+    try:
+        writer = ConsolidatedJSONWriter(output_file)
+        for report in reports:
+            writer.write(report)
+        writer.close()
         return True
 
     except Exception as e:
@@ -847,6 +1148,10 @@ def main():
                         help='Ativa o modo debug com informações detalhadas')
     parser.add_argument('--single', '-s', type=str,
                         help='Processa um único arquivo DICOM específico')
+    parser.add_argument('--ndjson', action='store_true',
+                        help='Salva em NDJSON (um relatório por linha) em vez do JSON consolidado')
+    parser.add_argument('--checkpoint', '-c', type=str,
+                        help='Arquivo SQLite de checkpoint para retomar uma execução interrompida')
 
     args = parser.parse_args()
 
@@ -870,11 +1175,11 @@ def main():
         report = extractor.extract_from_dicom(args.single, debug_mode=args.debug)
 
         if report:
-            report_dict = asdict(report)
-
-            output_file = args.output or f"ct_report_single_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            extension = 'ndjson' if args.ndjson else 'json'
+            output_file = args.output or f"ct_report_single_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
 
-            if save_consolidated_json([report_dict], output_file):
+            save = save_ndjson if args.ndjson else save_consolidated_json
+            if save([report.to_dict()], output_file):
                 print(f"✅ Relatório salvo em: {output_file}")
             else:
                 print("❌ Erro ao salvar o relatório")
@@ -886,13 +1191,14 @@ def main():
             print(f"❌ Pasta não encontrada: {args.folder}")
             return
 
-        reports = process_all_dicoms_recursive(args.folder, args.output, args.debug)
+        total_reports = process_all_dicoms_recursive(args.folder, args.output, args.debug, args.ndjson,
+                                                     args.checkpoint)
 
-        if not reports:
+        if not total_reports:
             print("\n⚠️ Nenhum relatório foi processado com sucesso.")
         else:
             print(f"\n🎯 Processamento concluído com sucesso!")
-            print(f"📊 Total de relatórios processados: {len(reports)}")
+            print(f"📊 Total de relatórios processados: {total_reports}")
 
     print("\n" + "=" * 80)
 